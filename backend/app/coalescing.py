@@ -0,0 +1,34 @@
+import asyncio
+from starlette.concurrency import run_in_threadpool
+
+class SingleFlight:
+    """Share one call between callers asking for the same key
+
+    The first caller runs `fn` in the threadpool; callers that arrive while it is
+    still running, or up to `ttl` seconds after it finished, get the same result
+    instead of issuing their own query. Failures are never shared past the call.
+    Results are shared, so `fn` must return data detached from any session.
+    """
+
+    def __init__(self, ttl=0.0):
+        self.ttl = ttl
+        self._calls = {}
+
+    async def do(self, key, fn, *args):
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._finished(key, done))
+        # Shield so one client disconnecting doesn't cancel the query for the rest
+        return await asyncio.shield(call)
+
+    def _finished(self, key, call):
+        if self.ttl > 0 and not call.cancelled() and call.exception() is None:
+            asyncio.get_running_loop().call_later(self.ttl, self._forget, key, call)
+        else:
+            self._forget(key, call)
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,138 @@
+"""Negotiated gzip/brotli compression for JSON responses
+
+Responses smaller than COMPRESSION_MIN_SIZE go out as-is. Responses that
+carry an ETag are treated as immutable for that ETag, so their compressed
+bodies are kept in an LRU and reused instead of being compressed again.
+Brotli is used only when the optional `brotli` package is installed.
+"""
+from collections import OrderedDict
+from starlette.datastructures import Headers, MutableHeaders
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_CACHE_ENTRIES = int(os.getenv("COMPRESSION_CACHE_ENTRIES", "1024"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+def negotiate_encoding(accept_encoding: str):
+    """Pick the best encoding we support from an Accept-Encoding header"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    preferences = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [name for name in preferences if accepted.get(name, accepted.get("*", 0)) > 0]
+    if not candidates:
+        return None
+    # Highest q-value wins; ties go to the first (smallest output) preference
+    return max(candidates, key=lambda name: accepted.get(name, accepted.get("*", 0)))
+
+def compress(body: bytes, encoding: str, cacheable: bool = False) -> bytes:
+    # Cached bodies are compressed once, so they can afford the slower, smaller settings
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if cacheable else 5)
+    return gzip.compress(body, compresslevel=9 if cacheable else 6, mtime=0)
+
+class PrecompressedCache:
+    """LRU of compressed bodies keyed by (path, query, ETag, encoding)"""
+
+    def __init__(self, max_entries=COMPRESSION_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+precompressed_cache = PrecompressedCache()
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON and text responses above a size threshold"""
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE, cache=None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache if cache is not None else precompressed_cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+        chunks = []
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if encoding and len(body) >= self.minimum_size:
+                body = self._compress(scope, headers, body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag:
+                    headers["ETag"] = etag[:-1] + f'-{encoding}"'
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compress(self, scope, headers, body, encoding):
+        etag = headers.get("etag")
+        if not etag:
+            return compress(body, encoding)
+
+        key = (scope["path"], scope.get("query_string", b""), etag, encoding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding, cacheable=True)
+            self.cache.put(key, compressed)
+        return compressed
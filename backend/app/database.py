@@ -1,7 +1,12 @@
 from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+import itertools
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,18 +16,101 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    pool_recycle=300,
-)
+# Comma-separated list of read replica URLs; reads fall back to the primary when empty
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+
+# How long a client's reads stay on the primary after it writes
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+READ_YOUR_WRITES_COOKIE = "animaldex_primary_until"
+# "lax" works when the frontend and API share a site (localhost:3000 -> localhost:8000);
+# use "none" when they are on different sites, which also makes the cookie Secure
+READ_YOUR_WRITES_SAMESITE = os.getenv("READ_YOUR_WRITES_SAMESITE", "lax").lower()
+
+# How long a replica that failed to connect is skipped before being retried
+REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+def _create_engine(url):
+    return create_engine(
+        url,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=300,
+    )
+
+engine = _create_engine(DATABASE_URL)
+replica_engines = [_create_engine(url) for url in DATABASE_REPLICA_URLS]
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+class ReplicaRouter:
+    """Round-robins reads across replicas, skipping ones that recently failed"""
+
+    def __init__(self, engines, retry_seconds=REPLICA_RETRY_SECONDS):
+        self.engines = list(engines)
+        self.retry_seconds = retry_seconds
+        self._cycle = itertools.cycle(self.engines)
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def pick(self):
+        """Return the next healthy replica engine, or None to use the primary"""
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                candidate = next(self._cycle)
+                if self._down_until.get(candidate, 0) <= now:
+                    return candidate
+        return None
+
+    def mark_down(self, replica):
+        with self._lock:
+            self._down_until[replica] = time.monotonic() + self.retry_seconds
+
+replica_router = ReplicaRouter(replica_engines)
+
+def mark_recent_write(response):
+    """Pin the client's reads to the primary for the read-your-writes window
+
+    Browsers calling the API from the frontend's origin only send the cookie
+    back with `credentials: 'include'` (see frontend/src/lib/api.ts).
+    """
+    primary_until = int(time.time()) + READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        str(primary_until),
+        max_age=READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        samesite=READ_YOUR_WRITES_SAMESITE,
+        secure=READ_YOUR_WRITES_SAMESITE == "none",
+    )
+
+def wants_primary(request: Request):
+    """True while the client is inside its read-your-writes window"""
+    try:
+        primary_until = int(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        return False
+    return primary_until > time.time()
+
+def open_read_session(use_primary=False):
+    """Open a session bound to a replica, falling back to the primary"""
+    if not use_primary:
+        while (replica := replica_router.pick()) is not None:
+            db = SessionLocal(bind=replica)
+            try:
+                # Check out the connection now so a dead replica fails over before the query
+                db.connection()
+                return db
+            except OperationalError:
+                db.close()
+                replica_router.mark_down(replica)
+    return SessionLocal()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -30,6 +118,14 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db(request: Request):
+    """Session for read-only endpoints, routed to a replica when possible"""
+    db = open_read_session(use_primary=wants_primary(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
 def init_db():
     """Initialize database with tables"""
     from app.models import models
@@ -0,0 +1,70 @@
+"""Strong ETags built from version stamps instead of response bodies
+
+Catalog rows carry `last_updated`, so a listing's validator is just the newest
+stamp plus the row count (which catches deletes); no body is serialized or
+hashed to compute it. Clients that revalidate with If-None-Match get a 304
+before the listing query runs.
+"""
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
+from app.snapshot import to_version
+
+# CompressionMiddleware appends these so each encoding gets its own strong ETag
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+def stamp_etag(prefix: str, row_id: int, last_updated: Optional[datetime]) -> str:
+    return make_etag(prefix, row_id, to_version(last_updated))
+
+def table_etag(db: Session, model, prefix: str) -> str:
+    """ETag for a listing of `model`: newest last_updated and row count"""
+    stamp, count = db.query(func.max(model.last_updated), func.count(model.id)).one()
+    return make_etag(prefix, to_version(stamp), count)
+
+def _split(tag: str):
+    """(opaque tag without W/, quotes or encoding suffix, encoding suffix)"""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)], suffix
+    return tag, ""
+
+def matching_etag(request: Request, etag: str) -> Optional[str]:
+    """The validator of the representation the client holds, if it is still current
+
+    That is `etag` with the encoding suffix of the If-None-Match tag that
+    matched it, or None when nothing matched.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    wanted, _ = _split(etag)
+    for tag in if_none_match.split(","):
+        opaque, suffix = _split(tag)
+        if opaque == wanted:
+            return etag[:-1] + suffix + '"'
+    return None
+
+def etag_matches(request: Request, etag: str) -> bool:
+    return matching_etag(request, etag) is not None
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set validators on `response`; return a 304 if the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    current = matching_etag(request, etag)
+    if current is not None:
+        # 304s have no body, so CompressionMiddleware never sees them: repeat the
+        # client's compressed validator and vary like the 200 did
+        return Response(status_code=304, headers={**headers, "ETag": current, "Vary": "Accept-Encoding"})
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,177 @@
+"""Per-habitat animal summaries kept up to date as the catalog changes
+
+The habitats listing shows "42 animals, 7 threatened" and a few thumbnails
+for every habitat. Computing that per request means grouping animal_habitats
+x animals by conservation status for every habitat, so the numbers live in
+habitat_animal_summaries instead. After each flush that adds, removes or
+re-classifies an animal, or changes habitat membership, only the affected
+habitats are recomputed, in the same transaction as the change. A refresh
+locks the habitat rows before counting, so concurrent changes to one habitat
+are counted one after the other instead of the later write overwriting the
+earlier one with a stale count. Rows are upserted rather than deleted and
+re-inserted, so they never collide on the primary key either.
+
+Bulk Core inserts (benchmarks/datagen.py, imports) bypass the ORM hooks and
+should finish with `refresh_summaries()` or the `refresh_habitat_summaries`
+job.
+"""
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+from datetime import datetime
+import os
+from app.models.models import Animal, ConservationStatus, Habitat, HabitatAnimalSummary, animal_habitats
+
+HABITAT_THUMBNAILS = int(os.getenv("HABITAT_THUMBNAILS", "4"))
+
+THREATENED = {
+    ConservationStatus.VULNERABLE,
+    ConservationStatus.ENDANGERED,
+    ConservationStatus.CRITICALLY_ENDANGERED,
+    ConservationStatus.EXTINCT_WILD,
+}
+
+# Animal columns that show up in a summary
+SUMMARIZED_ATTRIBUTES = ("conservation_status", "image_urls", "habitats")
+
+# Dialects with INSERT ... ON CONFLICT; anything else updates, then inserts what is missing
+UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+def _write_summaries(connection, rows):
+    """Insert or overwrite summary rows without a delete window other writers can race into"""
+    table = HabitatAnimalSummary.__table__
+    dialect = UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.habitat_id],
+            set_={column: statement.excluded[column] for column in rows[0] if column != "habitat_id"},
+        ), rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(
+            update(table).where(table.c.habitat_id == row["habitat_id"]).values(**row)
+        ).rowcount
+        if not updated:
+            connection.execute(insert(table).values(**row))
+
+def _lock_habitats(criteria):
+    """Habitat ids to refresh, row-locked until commit
+
+    Each refresh counts from its own snapshot, so two transactions adding animals to
+    one habitat would each write a count missing the other's animal. Holding the
+    habitat row makes the second wait, and under READ COMMITTED its counts then see
+    the first one's commit. NO KEY UPDATE still lets other transactions insert
+    memberships, whose foreign key check only takes KEY SHARE. Locks are taken in
+    id order so two refreshes can't deadlock; SQLite serializes writers anyway.
+    """
+    return select(Habitat.id).where(*criteria).order_by(Habitat.id).with_for_update(key_share=True)
+
+def refresh_summaries(connection, habitat_ids=None):
+    """Recompute the summaries of `habitat_ids` (every habitat when None)"""
+    if habitat_ids is not None and not habitat_ids:
+        return 0
+    habitat_ids = sorted(habitat_ids) if habitat_ids is not None else None
+
+    def only_affected(column):
+        return [column.in_(habitat_ids)] if habitat_ids is not None else []
+
+    summaries = {
+        habitat_id: {
+            "habitat_id": habitat_id, "animal_count": 0, "threatened_count": 0,
+            "status_counts": {}, "thumbnail_urls": [],
+        }
+        for habitat_id in connection.execute(_lock_habitats(only_affected(Habitat.id))).scalars()
+    }
+
+    histogram = connection.execute(
+        select(animal_habitats.c.habitat_id, Animal.conservation_status, func.count())
+        .join(Animal, Animal.id == animal_habitats.c.animal_id)
+        .where(*only_affected(animal_habitats.c.habitat_id))
+        .group_by(animal_habitats.c.habitat_id, Animal.conservation_status)
+    )
+    for habitat_id, status, count in histogram:
+        summary = summaries.get(habitat_id)
+        if summary is None:
+            continue
+        summary["animal_count"] += count
+        if status is not None:
+            summary["status_counts"][status.value] = count
+        if status in THREATENED:
+            summary["threatened_count"] += count
+
+    # The first few animals (by id) of each habitat that have a picture
+    position = func.row_number().over(
+        partition_by=animal_habitats.c.habitat_id, order_by=animal_habitats.c.animal_id
+    ).label("position")
+    pictured = (
+        select(animal_habitats.c.habitat_id, Animal.image_urls, position)
+        .join(Animal, Animal.id == animal_habitats.c.animal_id)
+        .where(Animal.image_urls.is_not(None), *only_affected(animal_habitats.c.habitat_id))
+        .subquery()
+    )
+    thumbnails = connection.execute(
+        select(pictured.c.habitat_id, pictured.c.image_urls)
+        .where(pictured.c.position <= HABITAT_THUMBNAILS)
+        .order_by(pictured.c.habitat_id, pictured.c.position)
+    )
+    for habitat_id, image_urls in thumbnails:
+        if habitat_id in summaries and image_urls:
+            summaries[habitat_id]["thumbnail_urls"].append(image_urls[0])
+
+    now = datetime.utcnow()
+    if summaries:
+        _write_summaries(connection, [{**summary, "refreshed_at": now} for summary in summaries.values()])
+    # Summaries of habitats that were deleted
+    connection.execute(delete(HabitatAnimalSummary).where(
+        *only_affected(HabitatAnimalSummary.habitat_id),
+        ~select(Habitat.id).where(Habitat.id == HabitatAnimalSummary.habitat_id).exists(),
+    ))
+    return len(summaries)
+
+def refresh_missing(connection):
+    """Create summaries for habitats that have none yet, e.g. on a fresh deploy"""
+    missing = connection.execute(
+        select(Habitat.id).where(
+            ~select(HabitatAnimalSummary.habitat_id)
+            .where(HabitatAnimalSummary.habitat_id == Habitat.id)
+            .exists()
+        )
+    ).scalars().all()
+    return refresh_summaries(connection, missing) if missing else 0
+
+def _habitat_ids(history):
+    return {habitat.id for habitat in history.sum() if habitat is not None and habitat.id is not None}
+
+def _affected_habitats(session):
+    affected = set()
+    changed_animals = set()
+    for instance in session.new | session.dirty | session.deleted:
+        if isinstance(instance, Animal):
+            changed = instance in session.new or instance in session.deleted or any(
+                attributes.get_history(instance, name, passive=attributes.PASSIVE_NO_INITIALIZE).has_changes()
+                for name in SUMMARIZED_ATTRIBUTES
+            )
+            if changed:
+                # Loaded memberships, including ones removed in this flush
+                affected |= _habitat_ids(
+                    attributes.get_history(instance, "habitats", passive=attributes.PASSIVE_NO_INITIALIZE)
+                )
+                changed_animals.add(instance.id)
+        elif isinstance(instance, Habitat):
+            history = attributes.get_history(instance, "animals", passive=attributes.PASSIVE_NO_INITIALIZE)
+            if instance in session.new or history.has_changes():
+                affected.add(instance.id)
+    if changed_animals:
+        # Memberships of changed animals whose habitats were never loaded
+        affected.update(session.connection().execute(
+            select(animal_habitats.c.habitat_id).where(animal_habitats.c.animal_id.in_(changed_animals))
+        ).scalars())
+    return affected
+
+@event.listens_for(Session, "after_flush")
+def _refresh_affected(session, flush_context):
+    affected = _affected_habitats(session)
+    if affected:
+        refresh_summaries(session.connection(), affected)
@@ -0,0 +1,262 @@
+"""In-process background jobs backed by the background_jobs table
+
+Tasks register with `@job("name")` (see app/tasks.py) and are queued with
+`enqueue()`. Every app process runs a JobRunner thread that claims pending
+rows with a conditional UPDATE, so several workers can share the queue
+without a broker, and hands them to a bounded thread or process pool.
+Failed jobs are retried with exponential backoff until `max_attempts`.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from app.database import SessionLocal, engine
+from app.models.models import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNNER_ENABLED = os.getenv("JOB_RUNNER_ENABLED", "1") == "1"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "thread")  # "thread" or "process"
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+# Running jobs older than this are assumed lost with their worker and re-queued
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "3600"))
+
+JOBS = {}
+
+class UnknownJob(ValueError):
+    pass
+
+def job(name, max_attempts=3):
+    """Register a task function under `name`"""
+    def register(function):
+        JOBS[name] = (function, max_attempts)
+        return function
+    return register
+
+def dedupe_key(name, args):
+    return f"{name}:{json.dumps(args or {}, sort_keys=True, separators=(',', ':'))}"
+
+def _pending_duplicate(db: Session, key):
+    return db.query(BackgroundJob).filter(
+        BackgroundJob.dedupe_key == key,
+        BackgroundJob.status == JobStatus.PENDING,
+    ).first()
+
+def enqueue(db: Session, name, args=None, run_after=None, dedupe=True) -> BackgroundJob:
+    """Queue a job, or return the identical job that is already pending"""
+    import app.tasks  # noqa: F401  (registers the built-in tasks)
+    if name not in JOBS:
+        raise UnknownJob(name)
+
+    key = dedupe_key(name, args) if dedupe else None
+    if key:
+        existing = _pending_duplicate(db, key)
+        if existing:
+            return existing
+
+    _, max_attempts = JOBS[name]
+    background_job = BackgroundJob(
+        name=name,
+        args=args or {},
+        dedupe_key=key,
+        max_attempts=max_attempts,
+        run_after=run_after or datetime.utcnow(),
+    )
+    try:
+        db.add(background_job)
+        db.commit()
+    except IntegrityError:
+        # Another worker queued the same job between our check and insert
+        db.rollback()
+        return _pending_duplicate(db, key)
+    db.refresh(background_job)
+    return background_job
+
+def execute(name, args):
+    """Run a registered task; module-level so process pools can pickle it"""
+    import app.tasks  # noqa: F401
+    function, _ = JOBS[name]
+    return function(**(args or {}))
+
+def _reset_pool():
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+class JobRunner:
+    """Polls the queue and runs claimed jobs on a bounded worker pool"""
+
+    def __init__(self, workers=JOB_WORKERS, executor=JOB_EXECUTOR, poll_seconds=JOB_POLL_SECONDS):
+        self.workers = workers
+        self.executor_kind = executor
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._executor = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        if self.executor_kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_reset_pool)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            # A failed requeue must not stop due jobs from being claimed
+            try:
+                self.requeue_stale()
+            except Exception:
+                logger.exception("Could not re-queue stale jobs")
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Job runner poll failed")
+            self._stopping.wait(self.poll_seconds)
+
+    def run_pending(self):
+        """Claim as many due jobs as there are free workers and submit them"""
+        with self._lock:
+            free = self.workers - len(self._running)
+        if free <= 0:
+            return 0
+
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            candidates = db.query(BackgroundJob.id, BackgroundJob.name, BackgroundJob.args).filter(
+                BackgroundJob.status == JobStatus.PENDING,
+                BackgroundJob.run_after <= now,
+            ).order_by(BackgroundJob.run_after, BackgroundJob.id).limit(free).all()
+
+            claimed = 0
+            for job_id, name, args in candidates:
+                # Only one worker's UPDATE can move the row out of PENDING
+                won = db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job_id, BackgroundJob.status == JobStatus.PENDING)
+                    .values(
+                        status=JobStatus.RUNNING,
+                        attempts=BackgroundJob.attempts + 1,
+                        started_at=now,
+                        locked_by=self.worker_id,
+                    )
+                ).rowcount
+                db.commit()
+                if won:
+                    self._submit(job_id, name, args)
+                    claimed += 1
+            return claimed
+        finally:
+            db.close()
+
+    def _submit(self, job_id, name, args):
+        with self._lock:
+            self._running.add(job_id)
+        future = self._executor.submit(execute, name, args)
+        future.add_done_callback(lambda done: self._finish(job_id, done))
+
+    def _finish(self, job_id, future):
+        db = SessionLocal()
+        try:
+            background_job = db.get(BackgroundJob, job_id)
+            now = datetime.utcnow()
+            error = future.exception()
+            if error is None:
+                background_job.status = JobStatus.SUCCEEDED
+                background_job.result = future.result()
+                background_job.last_error = None
+            else:
+                background_job.last_error = "".join(traceback.format_exception(error))
+                superseded = background_job.dedupe_key and _pending_duplicate(db, background_job.dedupe_key)
+                if background_job.attempts < background_job.max_attempts and not superseded:
+                    backoff = JOB_RETRY_BASE_SECONDS * 2 ** (background_job.attempts - 1)
+                    background_job.status = JobStatus.PENDING
+                    background_job.run_after = now + timedelta(seconds=backoff)
+                else:
+                    background_job.status = JobStatus.FAILED
+                logger.warning("Job %s (%s) failed: %s", job_id, background_job.name, error)
+            background_job.finished_at = now
+            background_job.locked_by = None
+            db.commit()
+        except Exception:
+            logger.exception("Could not record the outcome of job %s", job_id)
+        finally:
+            db.close()
+            with self._lock:
+                self._running.discard(job_id)
+
+    def requeue_stale(self):
+        """Put jobs whose worker died mid-run back in the queue"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            stale = and_(
+                BackgroundJob.status == JobStatus.RUNNING,
+                BackgroundJob.started_at < now - timedelta(seconds=JOB_TIMEOUT_SECONDS),
+            )
+            pending = aliased(BackgroundJob)
+            superseded = select(pending.id).where(
+                pending.status == JobStatus.PENDING,
+                pending.dedupe_key == BackgroundJob.dedupe_key,
+            ).exists()
+            rows = db.query(
+                BackgroundJob.id, BackgroundJob.dedupe_key,
+                or_(BackgroundJob.attempts >= BackgroundJob.max_attempts, superseded),
+            ).filter(stale).order_by(BackgroundJob.id).all()
+
+            # Out of attempts, an identical job is already queued, or an older copy of this
+            # stale job is re-queued instead: give up on it. At most one row per
+            # dedupe_key may be PENDING (uq_background_jobs_pending_dedupe).
+            failed, requeued, keys = [], [], set()
+            for job_id, key, give_up in rows:
+                if give_up or (key is not None and key in keys):
+                    failed.append(job_id)
+                else:
+                    requeued.append(job_id)
+                    keys.add(key)
+
+            if failed:
+                db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id.in_(failed), stale)
+                    .values(status=JobStatus.FAILED, locked_by=None, finished_at=now, last_error="Timed out")
+                    .execution_options(synchronize_session=False)
+                )
+            if requeued:
+                db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id.in_(requeued), stale)
+                    .values(status=JobStatus.PENDING, locked_by=None, last_error="Timed out; re-queued")
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+            return len(requeued)
+        finally:
+            db.close()
+
+job_runner = JobRunner()
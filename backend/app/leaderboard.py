@@ -0,0 +1,203 @@
+"""Conservation action leaderboards served from incremental counters
+
+Inserting a UserConservationAction bumps one counter row per period
+("day", "week") for its effort, school and action type, inside the same
+transaction. Each process keeps the current buckets in sorted in-memory
+boards, so a top-N request never aggregates the actions table: committed
+inserts are applied locally right away and the boards are reloaded from
+the small counters table every LEADERBOARD_REFRESH_SECONDS to pick up
+other workers' writes.
+"""
+from bisect import bisect_left, insort
+from sqlalchemy import and_, delete, event, insert, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+from app.models.models import ConservationActionCounter, UserConservationAction
+
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "5"))
+
+PERIODS = ("day", "week")
+SCOPES = ("effort", "school")
+ALL_ACTIONS = ""
+NO_SCHOOL = 0
+
+COUNTER_KEY = ["period", "bucket_start", "conservation_effort_id", "school_id", "action_type"]
+
+def bucket_start(period, moment):
+    day = datetime(moment.year, moment.month, moment.day)
+    return day if period == "day" else day - timedelta(days=day.weekday())
+
+class SortedCounts:
+    """Counts per member kept in descending order for cheap top-N reads"""
+
+    def __init__(self, counts=None):
+        self._counts = dict(counts or {})
+        self._order = sorted((-count, member) for member, count in self._counts.items())
+
+    def add(self, member, amount=1):
+        old = self._counts.get(member, 0)
+        if old:
+            del self._order[bisect_left(self._order, (-old, member))]
+        self._counts[member] = old + amount
+        insort(self._order, (-(old + amount), member))
+
+    def top(self, limit):
+        return [(member, -negative) for negative, member in self._order[:limit]]
+
+class Leaderboards:
+    def __init__(self, refresh_seconds=LEADERBOARD_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._boards = {}
+        self._buckets = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def top(self, db: Session, scope, period, action_type=ALL_ACTIONS, limit=10):
+        """[(effort id or school id, count), ...] for the current bucket, highest first"""
+        if self._is_stale():
+            self.refresh(db)
+        with self._lock:
+            board = self._boards.get((scope, period, action_type or ALL_ACTIONS))
+            return board.top(limit) if board else []
+
+    def _is_stale(self):
+        now = datetime.utcnow()
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_seconds
+            or any(self._buckets.get(period) != bucket_start(period, now) for period in PERIODS)
+        )
+
+    def refresh(self, db: Session):
+        """Reload the current day and week buckets from the counters table"""
+        now = datetime.utcnow()
+        buckets = {period: bucket_start(period, now) for period in PERIODS}
+        rows = db.execute(
+            select(
+                ConservationActionCounter.period,
+                ConservationActionCounter.conservation_effort_id,
+                ConservationActionCounter.school_id,
+                ConservationActionCounter.action_type,
+                ConservationActionCounter.count,
+            ).where(or_(*[
+                and_(ConservationActionCounter.period == period, ConservationActionCounter.bucket_start == start)
+                for period, start in buckets.items()
+            ]))
+        )
+
+        totals = {}
+        for period, effort_id, school_id, action_type, count in rows:
+            for action in {action_type, ALL_ACTIONS}:
+                effort_board = totals.setdefault(("effort", period, action), {})
+                effort_board[effort_id] = effort_board.get(effort_id, 0) + count
+                if school_id != NO_SCHOOL:
+                    school_board = totals.setdefault(("school", period, action), {})
+                    school_board[school_id] = school_board.get(school_id, 0) + count
+
+        boards = {key: SortedCounts(counts) for key, counts in totals.items()}
+        with self._lock:
+            self._boards = boards
+            self._buckets = buckets
+            self._loaded_at = time.monotonic()
+
+    def record(self, effort_id, school_id, action_type, completed_at):
+        """Apply one committed action to the in-memory boards"""
+        with self._lock:
+            for period in PERIODS:
+                if self._buckets.get(period) != bucket_start(period, completed_at):
+                    continue
+                for action in {action_type or ALL_ACTIONS, ALL_ACTIONS}:
+                    self._boards.setdefault(("effort", period, action), SortedCounts()).add(effort_id)
+                    if school_id != NO_SCHOOL:
+                        self._boards.setdefault(("school", period, action), SortedCounts()).add(school_id)
+
+leaderboards = Leaderboards()
+
+def increment_counter(connection, values, amount=1):
+    """Atomically add `amount` to the counter row identified by `values`"""
+    table = ConservationActionCounter.__table__
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(connection.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table).values(**values, count=amount)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=COUNTER_KEY,
+            set_={"count": table.c.count + statement.excluded.count},
+        ))
+        return
+
+    updated = connection.execute(
+        update(table)
+        .where(*[table.c[column] == values[column] for column in COUNTER_KEY])
+        .values(count=table.c.count + amount)
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(**values, count=amount))
+
+def rebuild_counters(connection):
+    """Recount every counter row from the actions table; returns the number of rows
+
+    Run inside a transaction. The counters table stays write-locked from
+    before the actions are read until the commit, so an action inserted
+    concurrently either is counted here or increments the rebuilt rows
+    afterwards, and never both or neither.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(f"LOCK TABLE {ConservationActionCounter.__tablename__} IN EXCLUSIVE MODE"))
+    # On SQLite the first write takes the database write lock, so delete before reading
+    connection.execute(delete(ConservationActionCounter))
+
+    counts = {}
+    rows = connection.execution_options(yield_per=10000).execute(
+        select(
+            UserConservationAction.conservation_effort_id,
+            UserConservationAction.school_id,
+            UserConservationAction.action_type,
+            UserConservationAction.completed_at,
+        ).where(UserConservationAction.conservation_effort_id.is_not(None))
+    )
+    for effort_id, school_id, action_type, completed_at in rows:
+        completed_at = completed_at or datetime.utcnow()
+        for period in PERIODS:
+            key = (period, bucket_start(period, completed_at), effort_id, school_id or NO_SCHOOL, action_type or ALL_ACTIONS)
+            counts[key] = counts.get(key, 0) + 1
+
+    if counts:
+        connection.execute(insert(ConservationActionCounter), [
+            dict(zip(COUNTER_KEY, key), count=count) for key, count in counts.items()
+        ])
+    return len(counts)
+
+@event.listens_for(UserConservationAction, "after_insert")
+def _count_action(mapper, connection, target):
+    if target.conservation_effort_id is None:
+        return  # Not on any effort's board (rebuild_counters skips these too)
+    school_id = target.school_id or NO_SCHOOL
+    completed_at = target.completed_at or datetime.utcnow()
+    for period in PERIODS:
+        increment_counter(connection, {
+            "period": period,
+            "bucket_start": bucket_start(period, completed_at),
+            "conservation_effort_id": target.conservation_effort_id,
+            "school_id": school_id,
+            "action_type": target.action_type or ALL_ACTIONS,
+        })
+
+    # The in-memory boards only hear about it once the transaction commits
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("leaderboard_actions", []).append(
+            (target.conservation_effort_id, school_id, target.action_type, completed_at)
+        )
+
+@event.listens_for(Session, "after_commit")
+def _publish_actions(session):
+    for action in session.info.pop("leaderboard_actions", []):
+        leaderboards.record(*action)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_actions(session):
+    session.info.pop("leaderboard_actions", None)
@@ -1,18 +1,84 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Table, Enum as SQLEnum
+from sqlalchemy import Column, Integer, Float, String, Text, Boolean, DateTime, ForeignKey, Table, Index, UniqueConstraint, Enum as SQLEnum, select, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import declared_attr, relationship
 from sqlalchemy.dialects.postgresql import JSON, ARRAY
 from datetime import datetime
 import enum
+import os
 
 Base = declarative_base()
 
+# Postgres only: LIST-partition the activity tables by school (see app/tenancy.py)
+TENANT_PARTITIONING = os.getenv("TENANT_PARTITIONING", "0") == "1"
+
+def _partition_options():
+    return {"postgresql_partition_by": "LIST (school_id)"} if TENANT_PARTITIONING else {}
+
+def _tenant_table_args(*indexes):
+    return (*indexes, _partition_options())
+
+def _user_school_id(context):
+    """Denormalize the owning user's school onto activity rows as they are inserted"""
+    user_id = context.get_current_parameters().get("user_id")
+    if user_id is None:
+        return None
+    # One lookup per statement: an executemany of 1000 rows must not become 1000 SELECTs
+    schools = getattr(context, "_user_schools", None)
+    if schools is None:
+        schools = context._user_schools = _schools_of(
+            context.connection, {parameters.get("user_id") for parameters in context.compiled_parameters},
+        )
+    if user_id not in schools:
+        schools.update(_schools_of(context.connection, {user_id}))
+    return schools.get(user_id)
+
+def _schools_of(connection, user_ids, chunk_size=500):
+    users = User.__table__
+    user_ids = sorted(user_id for user_id in user_ids if user_id is not None)
+    schools = dict.fromkeys(user_ids)
+    for start in range(0, len(user_ids), chunk_size):
+        schools.update(connection.execute(
+            select(users.c.id, users.c.school_id).where(users.c.id.in_(user_ids[start:start + chunk_size]))
+        ).all())
+    return schools
+
+def interaction_edge_key(predator_id, prey_id, interaction_type, habitat_id):
+    """Identity of a candidate edge, with missing endpoints spelled out so they compare equal"""
+    interaction_type = getattr(interaction_type, "value", interaction_type)
+    return ":".join("-" if part is None else str(part) for part in (predator_id, prey_id, interaction_type, habitat_id))
+
+def _candidate_edge_key(context):
+    parameters = context.get_current_parameters()
+    return interaction_edge_key(
+        parameters.get("predator_id"), parameters.get("prey_id"),
+        parameters.get("interaction_type"), parameters.get("habitat_id"),
+    )
+
+def _tenant_column():
+    # Partitioned tables need the partition key in the primary key
+    return Column(
+        Integer, ForeignKey("schools.id"), default=_user_school_id,
+        primary_key=TENANT_PARTITIONING, nullable=not TENANT_PARTITIONING,
+    )
+
+class TenantScoped:
+    """Mixin for activity rows that belong to their user's school (filtered by get_tenant_db)"""
+
+    @declared_attr
+    def school_id(cls):
+        return _tenant_column()
+
+# Text arrays are stored as JSON on SQLite so local replicas and test databases work
+StringArray = ARRAY(String).with_variant(JSON(), "sqlite")
+
 # Association tables for many-to-many relationships
 animal_habitats = Table(
     'animal_habitats',
     Base.metadata,
     Column('animal_id', Integer, ForeignKey('animals.id')),
-    Column('habitat_id', Integer, ForeignKey('habitats.id'))
+    Column('habitat_id', Integer, ForeignKey('habitats.id')),
+    # Keyset pagination of a habitat's animals walks this index
+    Index('ix_animal_habitats_habitat_animal', 'habitat_id', 'animal_id')
 )
 
 animal_conservation_efforts = Table(
@@ -27,7 +93,11 @@ user_animal_discoveries = Table(
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id')),
     Column('animal_id', Integer, ForeignKey('animals.id')),
-    Column('discovered_at', DateTime, default=datetime.utcnow)
+    Column('discovered_at', DateTime, default=datetime.utcnow),
+    Column('school_id', Integer, ForeignKey('schools.id'), default=_user_school_id),
+    Index('ix_user_animal_discoveries_school_user', 'school_id', 'user_id'),
+    Index('ix_user_animal_discoveries_school_discovered', 'school_id', 'discovered_at'),
+    **_partition_options()
 )
 
 # Enums
@@ -52,9 +122,35 @@ class EcosystemRelationType(enum.Enum):
     COMMENSALISM = "commensalism"
     PARASITISM = "parasitism"
 
+class ModerationStatus(enum.Enum):
+    PENDING = "pending"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+
+class JobStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 # Core Models
+class School(Base):
+    """Tenant: every user and activity row belongs to at most one school"""
+    __tablename__ = "schools"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
+    district = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    users = relationship("User", back_populates="school_tenant")
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_school_role", "school_id", "role"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -62,7 +158,8 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     full_name = Column(String)
     role = Column(SQLEnum(UserRole), default=UserRole.STUDENT)
-    school = Column(String, nullable=True)
+    school = Column(String, nullable=True)  # Display name; school_id is the tenant key
+    school_id = Column(Integer, ForeignKey("schools.id"), nullable=True)  # Not TenantScoped: set directly
     grade_level = Column(String, nullable=True)
     location = Column(String, nullable=True)  # For finding local organizations
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -72,6 +169,7 @@ class User(Base):
     discovered_animals = relationship("Animal", secondary=user_animal_discoveries, back_populates="discoverers")
     ecosystem_interactions = relationship("EcosystemInteraction", back_populates="created_by")
     conservation_actions = relationship("UserConservationAction", back_populates="user")
+    school_tenant = relationship("School", back_populates="users")
 
 class Animal(Base):
     __tablename__ = "animals"
@@ -79,25 +177,25 @@ class Animal(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     scientific_name = Column(String, nullable=False)
-    common_names = Column(ARRAY(String), default=[])
+    common_names = Column(StringArray, default=[])
     classification = Column(JSON)  # {"kingdom": "Animalia", "phylum": "Chordata", etc.}
     conservation_status = Column(SQLEnum(ConservationStatus))
     
     # Basic info
     description = Column(Text)
-    fun_facts = Column(ARRAY(String), default=[])
+    fun_facts = Column(StringArray, default=[])
     diet = Column(String)  # carnivore, herbivore, omnivore
     lifespan = Column(String)
     size_info = Column(JSON)  # {"length": "1-2m", "weight": "50-100kg"}
     
     # Media
-    image_urls = Column(ARRAY(String), default=[])
-    video_urls = Column(ARRAY(String), default=[])
-    audio_urls = Column(ARRAY(String), default=[])
+    image_urls = Column(StringArray, default=[])
+    video_urls = Column(StringArray, default=[])
+    audio_urls = Column(StringArray, default=[])
     
     # External API data
     external_api_id = Column(String, nullable=True)  # For syncing with animal APIs
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     habitats = relationship("Habitat", secondary=animal_habitats, back_populates="animals")
@@ -114,14 +212,27 @@ class Habitat(Base):
     description = Column(Text)
     climate = Column(String)
     geography = Column(String)
-    key_characteristics = Column(ARRAY(String), default=[])
+    key_characteristics = Column(StringArray, default=[])
     
     # Visualization data
     map_coordinates = Column(JSON)  # For showing on world map
     image_url = Column(String)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     animals = relationship("Animal", secondary=animal_habitats, back_populates="habitats")
+    summary = relationship("HabitatAnimalSummary", uselist=False, viewonly=True)
+
+class HabitatAnimalSummary(Base):
+    """Precomputed membership counts per habitat, refreshed as animals change (app/habitat_summaries.py)"""
+    __tablename__ = "habitat_animal_summaries"
+    
+    habitat_id = Column(Integer, ForeignKey("habitats.id", ondelete="CASCADE"), primary_key=True)
+    animal_count = Column(Integer, nullable=False, default=0)
+    threatened_count = Column(Integer, nullable=False, default=0)  # Vulnerable or worse
+    status_counts = Column(JSON, default={})  # {"Endangered": 7, ...}
+    thumbnail_urls = Column(StringArray, default=[])
+    refreshed_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 class EcosystemInteraction(Base):
     __tablename__ = "ecosystem_interactions"
@@ -137,13 +248,44 @@ class EcosystemInteraction(Base):
     # Student-created interactions
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     is_verified = Column(Boolean, default=False)  # Admin-verified interactions
+    candidate_id = Column(Integer, ForeignKey("interaction_candidates.id"), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     predator = relationship("Animal", foreign_keys=[predator_id], back_populates="predator_relationships")
     prey = relationship("Animal", foreign_keys=[prey_id], back_populates="prey_relationships")
     habitat = relationship("Habitat")
     created_by = relationship("User", back_populates="ecosystem_interactions")
+    candidate = relationship("InteractionCandidate", back_populates="submissions")
+
+class InteractionCandidate(Base):
+    """One moderation queue entry per distinct student-submitted edge"""
+    __tablename__ = "interaction_candidates"
+    __table_args__ = (
+        Index("ix_interaction_candidates_queue", "status", "vote_count"),
+        # NULLs never collide in a unique constraint, so uniqueness is enforced on edge_key instead
+        Index("uq_interaction_candidates_edge_key", "edge_key", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    edge_key = Column(String, nullable=False, default=_candidate_edge_key)
+    predator_id = Column(Integer, ForeignKey("animals.id"), nullable=True)
+    prey_id = Column(Integer, ForeignKey("animals.id"), nullable=True)
+    interaction_type = Column(SQLEnum(EcosystemRelationType), nullable=False)
+    habitat_id = Column(Integer, ForeignKey("habitats.id"), nullable=True)
+    
+    # Moderation state
+    vote_count = Column(Integer, default=1, nullable=False)  # Number of duplicate submissions
+    status = Column(SQLEnum(ModerationStatus), default=ModerationStatus.PENDING, nullable=False)
+    auto_verified = Column(Boolean, default=False)  # Approved by matching the verified graph
+    reviewed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    reviewed_at = Column(DateTime, nullable=True)
+    first_submitted_at = Column(DateTime, default=datetime.utcnow)
+    last_submitted_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    submissions = relationship("EcosystemInteraction", back_populates="candidate")
 
 class ConservationEffort(Base):
     __tablename__ = "conservation_efforts"
@@ -168,16 +310,21 @@ class ConservationEffort(Base):
     donation_url = Column(String, nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     is_active = Column(Boolean, default=True)
     
     # Relationships
     animals = relationship("Animal", secondary=animal_conservation_efforts, back_populates="conservation_efforts")
     user_actions = relationship("UserConservationAction", back_populates="conservation_effort")
 
-class UserConservationAction(Base):
+class UserConservationAction(TenantScoped, Base):
     __tablename__ = "user_conservation_actions"
+    __table_args__ = _tenant_table_args(
+        Index("ix_user_conservation_actions_school_user", "school_id", "user_id"),
+        Index("ix_user_conservation_actions_school_completed", "school_id", "completed_at"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     conservation_effort_id = Column(Integer, ForeignKey("conservation_efforts.id"))
     action_type = Column(String)  # "petition_signed", "learned_about", "shared"
@@ -188,6 +335,24 @@ class UserConservationAction(Base):
     user = relationship("User", back_populates="conservation_actions")
     conservation_effort = relationship("ConservationEffort", back_populates="user_actions")
 
+class ConservationActionCounter(Base):
+    """Per-bucket action counts, incremented as UserConservationAction rows are inserted"""
+    __tablename__ = "conservation_action_counters"
+    __table_args__ = (
+        UniqueConstraint(
+            "period", "bucket_start", "conservation_effort_id", "school_id", "action_type",
+            name="uq_conservation_action_counter_bucket",
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String, nullable=False)  # "day" or "week"
+    bucket_start = Column(DateTime, nullable=False)  # Start of the day / ISO week (UTC)
+    conservation_effort_id = Column(Integer, ForeignKey("conservation_efforts.id"), nullable=False)
+    school_id = Column(Integer, nullable=False, default=0)  # 0 when the user has no school
+    action_type = Column(String, nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+
 class UserProgress(Base):
     __tablename__ = "user_progress"
     
@@ -205,7 +370,7 @@ class UserProgress(Base):
     ms_ls2_5_activities = Column(Integer, default=0)  # Conservation solutions
     
     # Badges earned
-    badges_earned = Column(ARRAY(String), default=[])
+    badges_earned = Column(StringArray, default=[])
     
     last_updated = Column(DateTime, default=datetime.utcnow)
     
@@ -226,14 +391,64 @@ class Quiz(Base):
     is_published = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-class QuizAttempt(Base):
+class QuizAttempt(TenantScoped, Base):
     __tablename__ = "quiz_attempts"
+    __table_args__ = _tenant_table_args(
+        Index("ix_quiz_attempts_school_user", "school_id", "user_id"),
+        Index("ix_quiz_attempts_school_completed", "school_id", "completed_at"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     quiz_id = Column(Integer, ForeignKey("quizzes.id"))
     score = Column(Integer)
     max_score = Column(Integer)
     answers = Column(JSON)  # User's answers
     completed_at = Column(DateTime, default=datetime.utcnow)
-    time_taken = Column(Integer)  # in seconds
\ No newline at end of file
+    time_taken = Column(Integer)  # in seconds
+
+# Infrastructure
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String, primary_key=True)  # "classroom:<id>" or "client:<ip>"
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # Unix timestamp of the last refill
+
+class CatalogRevision(Base):
+    """Single-row counter bumped in the same transaction as every catalog write (app/snapshot.py)"""
+    __tablename__ = "catalog_revisions"
+    
+    id = Column(Integer, primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        Index("ix_background_jobs_queue", "status", "run_after"),
+        # At most one pending job per dedupe key, even with several app workers
+        Index(
+            "uq_background_jobs_pending_dedupe", "dedupe_key", unique=True,
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, index=True)  # Registered task name, e.g. "seed_database"
+    args = Column(JSON)  # Keyword arguments for the task
+    dedupe_key = Column(String, nullable=True)
+    status = Column(SQLEnum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    
+    # Retries
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)  # Backoff between attempts
+    last_error = Column(Text, nullable=True)
+    
+    result = Column(JSON, nullable=True)
+    locked_by = Column(String, nullable=True)  # Worker that claimed the job
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
\ No newline at end of file
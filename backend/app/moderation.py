@@ -0,0 +1,158 @@
+"""Moderation queue for student-submitted ecosystem interactions
+
+Every submission is stored as its own EcosystemInteraction, but identical
+edges (same predator, prey, interaction type and habitat) share one
+InteractionCandidate that counts the votes. Candidates are unique on their
+`edge_key`, which spells out missing endpoints so that two submissions
+without a habitat still collide. Admins review candidates, not rows, and
+every review is a pair of set-based UPDATEs: one for the candidates, which
+returns their ids, and one for all of their submissions.
+
+A new candidate is approved automatically when the verified graph already
+has the same predator -> prey edge of the same type in any habitat.
+"""
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from datetime import datetime
+from app.models.models import EcosystemInteraction, InteractionCandidate, ModerationStatus, interaction_edge_key
+from app.schemas.ecosystem_interaction import CandidateReview, EcosystemInteractionCreate, ReviewResult
+
+# Ids per UPDATE ... WHERE candidate_id IN (...), well under SQLite's bound-parameter limit
+VERIFY_CHUNK_SIZE = 500
+
+def _same_edge(model, predator_id, prey_id, interaction_type):
+    return and_(
+        model.predator_id.is_not_distinct_from(predator_id),
+        model.prey_id.is_not_distinct_from(prey_id),
+        model.interaction_type == interaction_type,
+    )
+
+def _in_verified_graph(db: Session, predator_id, prey_id, interaction_type):
+    return db.query(EcosystemInteraction.id).filter(
+        EcosystemInteraction.is_verified.is_(True),
+        _same_edge(EcosystemInteraction, predator_id, prey_id, interaction_type),
+    ).first() is not None
+
+def _find_candidate(db: Session, edge):
+    return db.query(InteractionCandidate).filter(
+        InteractionCandidate.edge_key == interaction_edge_key(**edge)
+    ).with_for_update().first()
+
+def _add_vote(db: Session, candidate, now):
+    # Increment in SQL so concurrent votes on the same candidate are never lost
+    db.execute(
+        update(InteractionCandidate)
+        .where(InteractionCandidate.id == candidate.id)
+        .values(vote_count=InteractionCandidate.vote_count + 1, last_submitted_at=now)
+        .execution_options(synchronize_session=False)
+    )
+
+def _create_candidate(db: Session, edge, now):
+    candidate = InteractionCandidate(**edge, first_submitted_at=now, last_submitted_at=now)
+    if _in_verified_graph(db, edge["predator_id"], edge["prey_id"], edge["interaction_type"]):
+        candidate.status = ModerationStatus.APPROVED
+        candidate.auto_verified = True
+        candidate.reviewed_at = now
+
+    try:
+        with db.begin_nested():
+            db.add(candidate)
+    except IntegrityError:
+        # Another request created the same candidate first; vote on that one instead
+        candidate = _find_candidate(db, edge)
+        _add_vote(db, candidate, now)
+    return candidate
+
+def submit_interaction(db: Session, submission: EcosystemInteractionCreate) -> EcosystemInteraction:
+    """Store a submission and count it as a vote on its candidate edge"""
+    now = datetime.utcnow()
+    edge = {
+        "predator_id": submission.predator_id,
+        "prey_id": submission.prey_id,
+        "interaction_type": submission.interaction_type,
+        "habitat_id": submission.habitat_id,
+    }
+
+    candidate = _find_candidate(db, edge)
+    if candidate is None:
+        candidate = _create_candidate(db, edge, now)
+    else:
+        _add_vote(db, candidate, now)
+
+    interaction = EcosystemInteraction(
+        **submission.dict(),
+        candidate=candidate,
+        is_verified=candidate.status == ModerationStatus.APPROVED,
+    )
+    db.add(interaction)
+    db.commit()
+    db.refresh(interaction)
+    return interaction
+
+def _verify_batch(db: Session, candidate_ids):
+    """Verify every submission of the candidates approved in one batch"""
+    verified = 0
+    for start in range(0, len(candidate_ids), VERIFY_CHUNK_SIZE):
+        verified += db.execute(
+            update(EcosystemInteraction)
+            .where(
+                EcosystemInteraction.candidate_id.in_(candidate_ids[start:start + VERIFY_CHUNK_SIZE]),
+                EcosystemInteraction.is_verified.is_(False),
+            )
+            .values(is_verified=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    return verified
+
+def _auto_verify(db: Session, now):
+    verified = aliased(EcosystemInteraction)
+    in_verified_graph = select(verified.id).where(
+        verified.is_verified.is_(True),
+        _same_edge(verified, InteractionCandidate.predator_id, InteractionCandidate.prey_id, InteractionCandidate.interaction_type),
+    ).exists()
+    approved = db.execute(
+        update(InteractionCandidate)
+        .where(InteractionCandidate.status == ModerationStatus.PENDING, in_verified_graph)
+        .values(status=ModerationStatus.APPROVED, auto_verified=True, reviewed_at=now)
+        .returning(InteractionCandidate.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    return len(approved), _verify_batch(db, approved)
+
+def auto_verify_pending(db: Session) -> ReviewResult:
+    """Approve every pending candidate whose edge is already in the verified graph"""
+    candidates, interactions = _auto_verify(db, datetime.utcnow())
+    db.commit()
+    return ReviewResult(candidates_updated=candidates, interactions_updated=interactions)
+
+def review_candidates(db: Session, review: CandidateReview, status: ModerationStatus) -> ReviewResult:
+    """Approve or reject pending candidates in bulk, by id and/or vote threshold"""
+    selectors = []
+    if review.candidate_ids:
+        selectors.append(InteractionCandidate.id.in_(review.candidate_ids))
+    if review.min_votes:
+        selectors.append(InteractionCandidate.vote_count >= review.min_votes)
+    if not selectors:
+        return ReviewResult(candidates_updated=0, interactions_updated=0)
+
+    now = datetime.utcnow()
+    reviewed = db.execute(
+        update(InteractionCandidate)
+        .where(InteractionCandidate.status == ModerationStatus.PENDING, or_(*selectors))
+        .values(status=status, reviewed_at=now, reviewed_by_id=review.reviewed_by_id)
+        .returning(InteractionCandidate.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    candidates = len(reviewed)
+
+    interactions = 0
+    if status == ModerationStatus.APPROVED and reviewed:
+        interactions = _verify_batch(db, reviewed)
+        # Newly verified edges may settle other pending candidates for the same edge
+        auto_candidates, auto_interactions = _auto_verify(db, now)
+        candidates += auto_candidates
+        interactions += auto_interactions
+
+    db.commit()
+    return ReviewResult(candidates_updated=candidates, interactions_updated=interactions)
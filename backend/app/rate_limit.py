@@ -0,0 +1,149 @@
+"""Token-bucket rate limiting for API requests
+
+Schools usually reach us through one NAT address, so a single address can be
+a whole building of classrooms. Its bucket is therefore sized for a school,
+and requests that name their classroom (X-Classroom-Id) also spend from a
+smaller bucket for that classroom within the address, so one busy classroom
+can't starve the rest of its school. The header is client-controlled, so it
+only ever adds a limit: inventing classroom ids never gets past the address
+bucket. Behind a reverse proxy, run uvicorn with --proxy-headers so the
+address is the client's and not the proxy's.
+"""
+from fastapi import HTTPException, Request
+from sqlalchemy import select, insert, update
+from sqlalchemy.exc import IntegrityError
+import math
+import os
+import threading
+import time
+from app.database import engine
+from app.models.models import RateLimitBucket
+
+# Sustained requests per second and burst size for each client address (a school's NAT)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "50"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "600"))
+
+# Extra limit for each classroom behind an address
+RATE_LIMIT_CLASSROOM_PER_SECOND = float(os.getenv("RATE_LIMIT_CLASSROOM_PER_SECOND", "5"))
+RATE_LIMIT_CLASSROOM_BURST = int(os.getenv("RATE_LIMIT_CLASSROOM_BURST", "60"))
+
+# "memory" keeps buckets per worker; "database" shares them across workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+
+CLASSROOM_HEADER = "X-Classroom-Id"
+
+def _refill(tokens, updated_at, now, rate, capacity):
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+def _retry_after(tokens, rate):
+    return (1 - tokens) / rate
+
+class MemoryBackend:
+    """Token buckets held in this process"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, capacity):
+        """Spend one token; returns 0 when allowed, else seconds until the next token"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated_at, now, rate, capacity)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return _retry_after(tokens, rate)
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.max_keys:
+                self._evict_full(now, rate, capacity)
+            return 0
+
+    def _evict_full(self, now, rate, capacity):
+        # A bucket that has refilled completely carries no state worth keeping
+        for key, (tokens, updated_at) in list(self._buckets.items()):
+            if _refill(tokens, updated_at, now, rate, capacity) >= capacity:
+                del self._buckets[key]
+
+class DatabaseBackend:
+    """Token buckets stored in the rate_limit_buckets table so every worker shares them"""
+
+    def __init__(self, bind=engine):
+        self.bind = bind
+        self.table = RateLimitBucket.__table__
+
+    def take(self, key, rate, capacity):
+        try:
+            return self._take(key, rate, capacity)
+        except IntegrityError:
+            # Another worker created the bucket first; it exists now
+            return self._take(key, rate, capacity)
+
+    def _take(self, key, rate, capacity):
+        now = time.time()
+        with self.bind.begin() as connection:
+            row = connection.execute(
+                select(self.table.c.tokens, self.table.c.updated_at)
+                .where(self.table.c.key == key)
+                .with_for_update()
+            ).first()
+            if row is None:
+                connection.execute(
+                    insert(self.table).values(key=key, tokens=capacity - 1, updated_at=now)
+                )
+                return 0
+            tokens = _refill(row.tokens, row.updated_at, now, rate, capacity)
+            allowed = tokens >= 1
+            connection.execute(
+                update(self.table)
+                .where(self.table.c.key == key)
+                .values(tokens=tokens - 1 if allowed else tokens, updated_at=now)
+            )
+            return 0 if allowed else _retry_after(tokens, rate)
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "database": DatabaseBackend,
+}
+
+def client_key(request: Request):
+    """Bucket key for the client's address"""
+    host = request.client.host if request.client else "unknown"
+    return f"client:{host}"
+
+def classroom_key(request: Request):
+    """Bucket key for the classroom the client names within its address, if any"""
+    classroom = request.headers.get(CLASSROOM_HEADER)
+    return f"{client_key(request)}:classroom:{classroom}" if classroom else None
+
+class RateLimiter:
+    """FastAPI dependency enforcing a token bucket per client address, plus one per classroom in it"""
+
+    def __init__(
+        self,
+        rate=RATE_LIMIT_PER_SECOND,
+        capacity=RATE_LIMIT_BURST,
+        classroom_rate=RATE_LIMIT_CLASSROOM_PER_SECOND,
+        classroom_capacity=RATE_LIMIT_CLASSROOM_BURST,
+        backend=None,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.classroom_rate = classroom_rate
+        self.classroom_capacity = classroom_capacity
+        self.backend = backend or BACKENDS[RATE_LIMIT_BACKEND]()
+
+    def __call__(self, request: Request):
+        retry_after = self.backend.take(client_key(request), self.rate, self.capacity)
+        classroom = classroom_key(request)
+        if not retry_after and classroom:
+            retry_after = self.backend.take(classroom, self.classroom_rate, self.classroom_capacity)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+rate_limit = RateLimiter()
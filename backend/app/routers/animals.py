@@ -1,23 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
-from app.database import get_db
+import os
+from app.coalescing import SingleFlight
+from app.database import get_db, get_read_db, open_read_session, wants_primary
+from app.etags import conditional_response, stamp_etag, table_etag
 from app.models.models import Animal, ConservationStatus
-from app.schemas.animal import AnimalCreate, AnimalResponse, AnimalSummary
+from app.rate_limit import rate_limit
+from app.schemas.animal import AnimalCreate, AnimalResponse, AnimalSuggestion, AnimalSummary
+from app.suggest import suggest_index
 
 router = APIRouter()
 
+# Detail requests for the same animal arriving within a second or two share one query
+ANIMAL_LOOKUP_TTL_SECONDS = float(os.getenv("ANIMAL_LOOKUP_TTL_SECONDS", "1.5"))
+animal_lookups = SingleFlight(ttl=ANIMAL_LOOKUP_TTL_SECONDS)
+# Clients that just wrote must see their change, so primary reads only share in-flight calls
+primary_animal_lookups = SingleFlight()
+
+def _load_animal(animal_id: int, use_primary: bool) -> Optional[AnimalResponse]:
+    with open_read_session(use_primary=use_primary) as db:
+        animal = db.query(Animal).filter(Animal.id == animal_id).first()
+        return AnimalResponse.model_validate(animal) if animal else None
+
+async def _get_animal_or_404(animal_id: int, request: Request) -> AnimalResponse:
+    use_primary = wants_primary(request)
+    lookups = primary_animal_lookups if use_primary else animal_lookups
+    animal = await lookups.do(animal_id, _load_animal, animal_id, use_primary)
+    
+    if not animal:
+        raise HTTPException(status_code=404, detail="Animal not found")
+    
+    return animal
+
 @router.get("/", response_model=List[AnimalSummary])
 async def get_animals(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of animals to skip"),
     limit: int = Query(20, ge=1, le=100, description="Number of animals to return"),
     search: Optional[str] = Query(None, description="Search animals by name"),
     conservation_status: Optional[ConservationStatus] = Query(None, description="Filter by conservation status"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a list of animals with optional filtering"""
     
+    not_modified = conditional_response(request, response, table_etag(db, Animal, "animals"))
+    if not_modified:
+        return not_modified
+    
     query = db.query(Animal)
     
     if search:
@@ -32,8 +64,23 @@ async def get_animals(
     animals = query.offset(skip).limit(limit).all()
     return animals
 
+@router.get("/suggest", response_model=List[AnimalSuggestion])
+async def suggest_animals(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Number of suggestions to return"),
+):
+    """Typeahead suggestions by name, scientific name or common name, most discovered first"""
+    
+    # Answered from the in-memory prefix index; no database round trip per keystroke
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return [
+        AnimalSuggestion(id=animal_id, name=name, scientific_name=scientific_name)
+        for animal_id, name, scientific_name in suggest_index.suggest(q, limit)
+    ]
+
 @router.get("/random", response_model=AnimalResponse)
-async def get_random_animal(db: Session = Depends(get_db)):
+async def get_random_animal(db: Session = Depends(get_read_db)):
     """Get a random animal for 'Animal of the Day' feature"""
     
     animal = db.query(Animal).order_by(func.random()).first()
@@ -43,27 +90,21 @@ async def get_random_animal(db: Session = Depends(get_db)):
     
     return animal
 
-@router.get("/{animal_id}", response_model=AnimalResponse)
-async def get_animal(animal_id: int, db: Session = Depends(get_db)):
+@router.get("/{animal_id}", response_model=AnimalResponse, dependencies=[Depends(rate_limit)])
+async def get_animal(animal_id: int, request: Request, response: Response):
     """Get detailed information about a specific animal"""
     
-    animal = db.query(Animal).filter(Animal.id == animal_id).first()
-    
-    if not animal:
-        raise HTTPException(status_code=404, detail="Animal not found")
-    
-    return animal
+    animal = await _get_animal_or_404(animal_id, request)
+    etag = stamp_etag("animal", animal.id, animal.last_updated)
+    return conditional_response(request, response, etag) or animal
 
-@router.get("/{animal_id}/facts", response_model=List[str])
-async def get_animal_facts(animal_id: int, db: Session = Depends(get_db)):
+@router.get("/{animal_id}/facts", response_model=List[str], dependencies=[Depends(rate_limit)])
+async def get_animal_facts(animal_id: int, request: Request, response: Response):
     """Get fun facts about a specific animal"""
     
-    animal = db.query(Animal).filter(Animal.id == animal_id).first()
-    
-    if not animal:
-        raise HTTPException(status_code=404, detail="Animal not found")
-    
-    return animal.fun_facts or []
+    animal = await _get_animal_or_404(animal_id, request)
+    etag = stamp_etag("animal-facts", animal.id, animal.last_updated)
+    return conditional_response(request, response, etag) or animal.fun_facts or []
 
 @router.post("/", response_model=AnimalResponse)
 async def create_animal(
@@ -1,18 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
-from app.database import get_db
-from app.models.models import ConservationEffort
-from app.schemas.conservation_effort import ConservationEffortSummary
+from app.database import get_db, get_read_db
+from app.etags import conditional_response, table_etag
+from app.leaderboard import PERIODS, SCOPES, leaderboards
+from app.models.models import ConservationEffort, School, User, UserConservationAction
+from app.schemas.conservation_effort import (
+    ConservationActionCreate, ConservationActionResponse, ConservationEffortSummary, LeaderboardEntry,
+)
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ConservationEffortSummary])
 async def get_conservation_efforts(
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db)
 ):
     """Get a list of conservation efforts"""
 
+    not_modified = conditional_response(request, response, table_etag(db, ConservationEffort, "conservation-efforts"))
+    if not_modified:
+        return not_modified
+
     conservation_efforts = db.query(ConservationEffort).all()
     return conservation_efforts
+
+@router.get("/leaderboard", response_model=List[LeaderboardEntry])
+async def get_conservation_leaderboard(
+    scope: str = Query("effort", pattern=f"^({'|'.join(SCOPES)})$", description="Rank efforts or schools"),
+    period: str = Query("week", pattern=f"^({'|'.join(PERIODS)})$", description="Current day or week"),
+    action_type: Optional[str] = Query(None, description="Only count this action, e.g. petition_signed"),
+    limit: int = Query(10, ge=1, le=100, description="Number of entries to return"),
+    db: Session = Depends(get_read_db)
+):
+    """Get the top efforts or schools by conservation actions this day or week"""
+
+    top = leaderboards.top(db, scope, period, action_type, limit)
+
+    if scope == "school":
+        names = dict(
+            db.query(School.id, School.name)
+            .filter(School.id.in_([school_id for school_id, _ in top]))
+            .all()
+        )
+        return [
+            LeaderboardEntry(rank=rank, count=count, school_id=school_id, school=names.get(school_id))
+            for rank, (school_id, count) in enumerate(top, start=1)
+        ]
+
+    titles = dict(
+        db.query(ConservationEffort.id, ConservationEffort.title)
+        .filter(ConservationEffort.id.in_([effort_id for effort_id, _ in top]))
+        .all()
+    )
+    return [
+        LeaderboardEntry(rank=rank, count=count, conservation_effort_id=effort_id, title=titles.get(effort_id))
+        for rank, (effort_id, count) in enumerate(top, start=1)
+    ]
+
+@router.post("/{effort_id}/actions", response_model=ConservationActionResponse)
+async def create_conservation_action(
+    effort_id: int,
+    action: ConservationActionCreate,
+    db: Session = Depends(get_db)
+):
+    """Record a student's conservation action (e.g. signing a petition)"""
+
+    if not db.query(ConservationEffort).filter(ConservationEffort.id == effort_id).first():
+        raise HTTPException(status_code=404, detail="Conservation effort not found")
+
+    if not db.query(User).filter(User.id == action.user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    db_action = UserConservationAction(**action.dict(), conservation_effort_id=effort_id)
+    db.add(db_action)
+    db.commit()
+    db.refresh(db_action)
+
+    return db_action
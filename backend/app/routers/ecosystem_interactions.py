@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db, get_read_db
+from app.models.models import Animal, EcosystemInteraction
+from app.moderation import submit_interaction
+from app.schemas.ecosystem_interaction import EcosystemInteractionCreate, EcosystemInteractionResponse
+
+router = APIRouter()
+
+@router.get("/", response_model=List[EcosystemInteractionResponse])
+async def get_ecosystem_interactions(
+    habitat_id: Optional[int] = Query(None, description="Filter by habitat"),
+    skip: int = Query(0, ge=0, description="Number of interactions to skip"),
+    limit: int = Query(100, ge=1, le=500, description="Number of interactions to return"),
+    db: Session = Depends(get_read_db)
+):
+    """Get verified ecosystem interactions (the food web)"""
+    
+    query = db.query(EcosystemInteraction).filter(EcosystemInteraction.is_verified.is_(True))
+    
+    if habitat_id is not None:
+        query = query.filter(EcosystemInteraction.habitat_id == habitat_id)
+    
+    return query.order_by(EcosystemInteraction.id).offset(skip).limit(limit).all()
+
+@router.post("/", response_model=EcosystemInteractionResponse)
+async def create_ecosystem_interaction(
+    interaction: EcosystemInteractionCreate,
+    db: Session = Depends(get_db)
+):
+    """Submit a student-created interaction for moderation"""
+    
+    animal_ids = {interaction.predator_id, interaction.prey_id} - {None}
+    if not animal_ids:
+        raise HTTPException(status_code=400, detail="An interaction needs at least one animal")
+    
+    if db.query(Animal).filter(Animal.id.in_(animal_ids)).count() != len(animal_ids):
+        raise HTTPException(status_code=404, detail="Animal not found")
+    
+    return submit_interaction(db, interaction)
@@ -1,19 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List, Optional
-from app.database import get_db
-from app.models.models import Habitat
-from app.schemas.habitat import HabitatSummary
+from app.database import get_read_db
+from app.etags import conditional_response, make_etag
+from app.models.models import Animal, Habitat, HabitatAnimalSummary, animal_habitats
+from app.schemas.habitat import HabitatAnimalsPage, HabitatSummary
+from app.snapshot import to_version
+import app.habitat_summaries  # noqa: F401  (keeps the summaries in sync on every flush)
 
 router = APIRouter()
 
 @router.get("/", response_model=List[HabitatSummary])
 async def get_habitats(
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db)
 ):
-    """Get a list of habitats"""
+    """Get a list of habitats with their precomputed animal counts and thumbnails"""
 
-    habitats = db.query(Habitat).all()
+    # Summaries change without touching habitats, so both stamps go in the ETag
+    stamp, count = db.query(func.max(Habitat.last_updated), func.count(Habitat.id)).one()
+    refreshed, summaries = db.query(
+        func.max(HabitatAnimalSummary.refreshed_at), func.count(HabitatAnimalSummary.habitat_id)
+    ).one()
+    etag = make_etag("habitats", to_version(stamp), count, to_version(refreshed), summaries)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    habitats = db.query(Habitat).options(joinedload(Habitat.summary)).all()
     return habitats
-    
\ No newline at end of file
+
+@router.get("/{habitat_id}/animals", response_model=HabitatAnimalsPage)
+async def get_habitat_animals(
+    habitat_id: int,
+    after: Optional[int] = Query(None, description="Return animals with an id greater than this"),
+    limit: int = Query(20, ge=1, le=100, description="Number of animals to return"),
+    db: Session = Depends(get_read_db)
+):
+    """Page through a habitat's animals in id order"""
+
+    if not db.query(Habitat.id).filter(Habitat.id == habitat_id).first():
+        raise HTTPException(status_code=404, detail="Habitat not found")
+
+    # Keyset pagination over (habitat_id, animal_id), so deep pages cost the same as the first
+    query = db.query(Animal).join(animal_habitats, animal_habitats.c.animal_id == Animal.id).filter(
+        animal_habitats.c.habitat_id == habitat_id
+    )
+    if after is not None:
+        query = query.filter(animal_habitats.c.animal_id > after)
+    animals = query.order_by(animal_habitats.c.animal_id).limit(limit + 1).all()
+
+    next_after = animals[limit - 1].id if len(animals) > limit else None
+    return HabitatAnimalsPage(animals=animals[:limit], next_after=next_after)
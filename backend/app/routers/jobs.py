@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.jobs import UnknownJob, enqueue
+from app.models.models import BackgroundJob, JobStatus
+from app.schemas.job import JobCreate, JobResponse
+
+router = APIRouter()
+
+@router.get("/", response_model=List[JobResponse])
+async def get_jobs(
+    status: Optional[JobStatus] = Query(None, description="Filter by job status"),
+    name: Optional[str] = Query(None, description="Filter by task name"),
+    limit: int = Query(50, ge=1, le=200, description="Number of jobs to return"),
+    db: Session = Depends(get_db)
+):
+    """Get the most recent background jobs"""
+    
+    query = db.query(BackgroundJob)
+    
+    if status:
+        query = query.filter(BackgroundJob.status == status)
+    
+    if name:
+        query = query.filter(BackgroundJob.name == name)
+    
+    return query.order_by(BackgroundJob.id.desc()).limit(limit).all()
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Get the status of a background job"""
+    
+    background_job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+    
+    if not background_job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return background_job
+
+@router.post("/", response_model=JobResponse, status_code=202)
+async def create_job(job: JobCreate, db: Session = Depends(get_db)):
+    """Queue a maintenance task; an identical pending job is returned instead of a duplicate"""
+    
+    try:
+        return enqueue(db, job.name, job.args, run_after=job.run_after)
+    except UnknownJob:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job.name}'")
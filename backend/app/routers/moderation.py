@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models.models import InteractionCandidate, ModerationStatus
+from app.moderation import auto_verify_pending, review_candidates
+from app.schemas.ecosystem_interaction import CandidateReview, InteractionCandidateResponse, ReviewResult
+
+router = APIRouter()
+
+@router.get("/candidates", response_model=List[InteractionCandidateResponse])
+async def get_interaction_candidates(
+    status: ModerationStatus = Query(ModerationStatus.PENDING, description="Queue to list"),
+    min_votes: int = Query(1, ge=1, description="Only candidates with at least this many votes"),
+    skip: int = Query(0, ge=0, description="Number of candidates to skip"),
+    limit: int = Query(50, ge=1, le=500, description="Number of candidates to return"),
+    db: Session = Depends(get_db)
+):
+    """Get the moderation queue, most-voted candidates first"""
+    
+    return db.query(InteractionCandidate).filter(
+        InteractionCandidate.status == status,
+        InteractionCandidate.vote_count >= min_votes,
+    ).order_by(
+        InteractionCandidate.vote_count.desc(), InteractionCandidate.id
+    ).offset(skip).limit(limit).all()
+
+@router.post("/candidates/approve", response_model=ReviewResult)
+async def approve_interaction_candidates(review: CandidateReview, db: Session = Depends(get_db)):
+    """Approve pending candidates in bulk and verify all of their submissions"""
+    
+    return review_candidates(db, review, ModerationStatus.APPROVED)
+
+@router.post("/candidates/reject", response_model=ReviewResult)
+async def reject_interaction_candidates(review: CandidateReview, db: Session = Depends(get_db)):
+    """Reject pending candidates in bulk"""
+    
+    return review_candidates(db, review, ModerationStatus.REJECTED)
+
+@router.post("/candidates/auto-verify", response_model=ReviewResult)
+async def auto_verify_interaction_candidates(db: Session = Depends(get_db)):
+    """Approve pending candidates whose edge is already in the verified graph"""
+    
+    return auto_verify_pending(db)
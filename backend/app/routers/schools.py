@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from typing import List
+from app.database import get_db, get_read_db
+from app.models.models import QuizAttempt, School, User, UserConservationAction, UserRole, user_animal_discoveries
+from app.schemas.school import SchoolActivitySummary, SchoolCreate, SchoolResponse
+from app.tenancy import get_tenant_db
+
+router = APIRouter()
+
+@router.get("/", response_model=List[SchoolResponse])
+async def get_schools(db: Session = Depends(get_read_db)):
+    """Get every school (tenant)"""
+    
+    return db.query(School).order_by(School.name).all()
+
+@router.post("/", response_model=SchoolResponse)
+async def create_school(school: SchoolCreate, db: Session = Depends(get_db)):
+    """Register a school; on Postgres with partitioning this also creates its partitions"""
+    
+    if db.query(School.id).filter(School.name == school.name).first():
+        raise HTTPException(status_code=400, detail="School already exists")
+    
+    db_school = School(**school.dict())
+    db.add(db_school)
+    db.commit()
+    db.refresh(db_school)
+    return db_school
+
+@router.get("/{school_id}/summary", response_model=SchoolActivitySummary)
+async def get_school_summary(school_id: int, db: Session = Depends(get_tenant_db)):
+    """Get a school's activity totals; every query is limited to that school's rows"""
+    
+    students = db.query(func.count(User.id)).filter(User.role == UserRole.STUDENT).scalar()
+    attempts, average_score = db.query(func.count(QuizAttempt.id), func.avg(QuizAttempt.score)).one()
+    actions = db.query(func.count(UserConservationAction.id)).scalar()
+    # Core table, so the session's tenant filter does not apply; filter explicitly
+    discoveries = db.execute(
+        select(func.count()).select_from(user_animal_discoveries)
+        .where(user_animal_discoveries.c.school_id == school_id)
+    ).scalar()
+    
+    return SchoolActivitySummary(
+        school_id=school_id,
+        students=students,
+        quiz_attempts=attempts,
+        average_quiz_score=average_score,
+        conservation_actions=actions,
+        animals_discovered=discoveries,
+    )
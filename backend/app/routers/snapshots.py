@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import os
+from app.database import get_db, get_read_db
+from app.jobs import enqueue
+from app.schemas.snapshot import SnapshotManifest
+from app.snapshot import SCHEMA_VERSION, catalog_version, published_at, published_bundle
+
+router = APIRouter()
+
+# Seconds a device should wait before asking again while the first bundle builds
+BUNDLE_RETRY_SECONDS = 60
+
+@router.get("/manifest", response_model=SnapshotManifest)
+async def get_snapshot_manifest(db: Session = Depends(get_read_db)):
+    """Get the current catalog version so devices can decide whether to sync"""
+
+    return SnapshotManifest(version=catalog_version(db), schema_version=SCHEMA_VERSION)
+
+@router.get("/bundle")
+def get_snapshot_bundle(
+    since: Optional[int] = Query(None, ge=0, description="Catalog version the device already has"),
+    schema_version: int = Query(SCHEMA_VERSION, description="Bundle layout the device understands"),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db)
+):
+    """Download the newest built catalog bundle, as a delta when one exists for the device's version"""
+
+    # Devices on an older layout can't apply a delta to their copy
+    if schema_version != SCHEMA_VERSION:
+        since = None
+
+    headers = {"X-Snapshot-Schema-Version": str(SCHEMA_VERSION)}
+    version = catalog_version(db)
+    if since == version:
+        headers["X-Snapshot-Version"] = str(version)
+        return Response(status_code=204, headers=headers)
+
+    # Building is a full catalog dump, so it runs on the job queue, which keeps one pending copy per build
+    bundle = published_bundle(since)
+    pending = bundle is None or bundle[1] < version
+    if pending:
+        enqueue(primary_db, "build_snapshot")
+    elif since and bundle[2] is None and since < bundle[1] and published_at(since):
+        # Devices asking for this delta get the full bundle until it is built
+        enqueue(primary_db, "build_snapshot", {"since": since})
+        pending = True
+
+    if bundle is None:
+        raise HTTPException(
+            status_code=503,
+            detail="The catalog bundle is being built",
+            headers={**headers, "Retry-After": str(BUNDLE_RETRY_SECONDS)},
+        )
+
+    path, built_version, built_since = bundle
+    if since == built_version:
+        headers["X-Snapshot-Version"] = str(built_version)
+        return Response(status_code=204, headers=headers)
+
+    headers.update({
+        "X-Snapshot-Version": str(built_version),
+        "X-Snapshot-Since": str(built_since or 0),
+        # Devices sync about once a day, so an hour of proxy caching is harmless once
+        # the bundle is current; a stand-in must not outlive the build that replaces it
+        "Cache-Control": "no-cache" if pending else "public, max-age=3600",
+    })
+    return FileResponse(
+        path,
+        media_type="application/gzip",
+        filename=os.path.basename(path),
+        headers=headers,
+    )
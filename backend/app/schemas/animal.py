@@ -45,4 +45,9 @@ class AnimalSummary(BaseModel):
     diet: Optional[str] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AnimalSuggestion(BaseModel):
+    id: int
+    name: str
+    scientific_name: str
@@ -28,3 +28,24 @@ class ConservationEffortSummary(ConservationEffortBase):
     
     class Config:
         from_attributes = True
+
+class ConservationActionCreate(BaseModel):
+    user_id: int
+    action_type: str  # "petition_signed", "learned_about", "shared"
+    notes: Optional[str] = None
+
+class ConservationActionResponse(ConservationActionCreate):
+    id: int
+    conservation_effort_id: int
+    completed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    count: int
+    conservation_effort_id: Optional[int] = None
+    title: Optional[str] = None
+    school_id: Optional[int] = None
+    school: Optional[str] = None
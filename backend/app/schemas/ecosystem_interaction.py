@@ -0,0 +1,50 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from app.models.models import EcosystemRelationType, ModerationStatus
+
+class EcosystemInteractionBase(BaseModel):
+    predator_id: Optional[int] = None
+    prey_id: Optional[int] = None
+    interaction_type: EcosystemRelationType
+    habitat_id: Optional[int] = None
+    description: Optional[str] = None
+    strength: int = Field(1, ge=1, le=5)
+
+class EcosystemInteractionCreate(EcosystemInteractionBase):
+    created_by_id: Optional[int] = None
+
+class EcosystemInteractionResponse(EcosystemInteractionBase):
+    id: int
+    created_by_id: Optional[int] = None
+    is_verified: bool = False
+    candidate_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class InteractionCandidateResponse(BaseModel):
+    id: int
+    predator_id: Optional[int] = None
+    prey_id: Optional[int] = None
+    interaction_type: EcosystemRelationType
+    habitat_id: Optional[int] = None
+    vote_count: int
+    status: ModerationStatus
+    auto_verified: bool = False
+    first_submitted_at: datetime
+    last_submitted_at: datetime
+    reviewed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class CandidateReview(BaseModel):
+    candidate_ids: List[int] = []
+    min_votes: Optional[int] = Field(None, ge=1, description="Also review every pending candidate with at least this many votes")
+    reviewed_by_id: Optional[int] = None
+
+class ReviewResult(BaseModel):
+    candidates_updated: int
+    interactions_updated: int
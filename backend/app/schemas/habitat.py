@@ -1,6 +1,7 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from app.schemas.animal import AnimalSummary
 
 class HabitatBase(BaseModel):
     name: str
@@ -17,6 +18,15 @@ class HabitatResponse(HabitatBase):
     class Config:
         from_attributes = True
 
+class HabitatAnimalStats(BaseModel):
+    animal_count: int = 0
+    threatened_count: int = 0
+    status_counts: Dict[str, int] = {}
+    thumbnail_urls: List[str] = []
+    
+    class Config:
+        from_attributes = True
+
 class HabitatSummary(BaseModel):
     id: int
     name: str
@@ -24,6 +34,11 @@ class HabitatSummary(BaseModel):
     climate: str = None
     key_characteristics: List[str] = []
     image_url: Optional[str] = None
+    summary: Optional[HabitatAnimalStats] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class HabitatAnimalsPage(BaseModel):
+    animals: List[AnimalSummary]
+    next_after: Optional[int] = None  # Pass as `after` to get the next page
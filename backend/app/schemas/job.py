@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+from app.models.models import JobStatus
+
+class JobCreate(BaseModel):
+    name: str
+    args: Dict[str, Any] = {}
+    run_after: Optional[datetime] = None
+
+class JobResponse(BaseModel):
+    id: int
+    name: str
+    args: Optional[Dict[str, Any]] = None
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str] = None
+    result: Optional[Any] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
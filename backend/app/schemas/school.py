@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class SchoolCreate(BaseModel):
+    name: str
+    district: Optional[str] = None
+
+class SchoolResponse(SchoolCreate):
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class SchoolActivitySummary(BaseModel):
+    school_id: int
+    students: int
+    quiz_attempts: int
+    average_quiz_score: Optional[float] = None
+    conservation_actions: int
+    animals_discovered: int
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+class SnapshotManifest(BaseModel):
+    version: int  # Catalog revision; send it back as `since` to get a delta
+    schema_version: int
+    format: str = "sqlite+gzip"
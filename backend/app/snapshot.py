@@ -0,0 +1,287 @@
+"""Offline catalog bundles for classroom devices
+
+A bundle is a gzip-compressed SQLite file holding the animal, habitat,
+conservation effort and verified interaction catalog. Its version is the
+catalog revision: a counter bumped in the same transaction as every write to
+a catalog or association table, whether it comes from an ORM flush, a bulk
+UPDATE (e.g. un-verifying interactions) or a Core insert. Interaction writes
+count only when they can reach a bundle: verified inserts and updates of
+shipped columns (including `is_verified`). Student submissions arrive
+unverified, so they neither move the version nor queue on its row lock.
+
+Bundles are built by the `build_snapshot` job (app/tasks.py) or
+build_snapshot.py, never in a request: the download endpoint serves the
+newest bundle on disk and queues a build when the catalog has moved on.
+
+A version is "published" once this server has built a bundle for it, and it
+records when that happened. Devices holding a published version get a delta
+with the rows stamped after that moment (less a safety overlap for
+transactions that were still open), the full association tables, and every
+current id so they can drop deleted or un-verified rows. Any other `since`
+gets the full bundle, so clients can't make the server build arbitrary files.
+"""
+from sqlalchemy import event, func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+from app.models.models import (
+    Animal, Habitat, ConservationEffort, EcosystemInteraction, CatalogRevision,
+    animal_habitats, animal_conservation_efforts,
+)
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+# Number of published versions devices can still get a delta from
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "20"))
+# Rows stamped this long before a release are re-sent in deltas from it, to cover
+# writes that were stamped before the release but committed after it
+SNAPSHOT_DELTA_OVERLAP_SECONDS = int(os.getenv("SNAPSHOT_DELTA_OVERLAP_SECONDS", "300"))
+
+# Bump when the bundle's table layout changes; devices then need a full bundle
+SCHEMA_VERSION = 1
+
+CATALOG_TABLES = {
+    "animals": (Animal, [
+        "id", "name", "scientific_name", "common_names", "conservation_status",
+        "description", "fun_facts", "diet", "lifespan", "size_info",
+        "image_urls", "video_urls", "audio_urls", "last_updated",
+    ]),
+    "habitats": (Habitat, [
+        "id", "name", "description", "climate", "geography",
+        "key_characteristics", "map_coordinates", "image_url", "last_updated",
+    ]),
+    "conservation_efforts": (ConservationEffort, [
+        "id", "title", "description", "organization_name", "website_url", "location",
+        "image_url", "conservation_problem", "proposed_solutions", "success_metrics",
+        "current_status", "petition_url", "volunteer_url", "donation_url", "last_updated",
+    ]),
+    "ecosystem_interactions": (EcosystemInteraction, [
+        "id", "predator_id", "prey_id", "interaction_type", "habitat_id",
+        "description", "strength", "last_updated",
+    ]),
+}
+
+ASSOCIATION_TABLES = {
+    "animal_habitats": animal_habitats,
+    "animal_conservation_efforts": animal_conservation_efforts,
+}
+
+CATALOG_WRITE_TABLES = {model.__tablename__ for model, _ in CATALOG_TABLES.values()} | set(ASSOCIATION_TABLES)
+
+# Interaction columns an UPDATE must set to change a bundle; last_updated is stamped on every update
+SHIPPED_INTERACTION_COLUMNS = set(CATALOG_TABLES["ecosystem_interactions"][1]) - {"id", "last_updated"} | {"is_verified"}
+
+def _catalog_filter(model):
+    # Only admin-verified interactions ship to devices
+    if model is EcosystemInteraction:
+        return EcosystemInteraction.is_verified.is_(True)
+    return None
+
+def to_version(stamp: Optional[datetime]) -> int:
+    if stamp is None:
+        return 0
+    return int(stamp.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def catalog_version(db: Session) -> int:
+    """Current catalog revision"""
+    return db.query(CatalogRevision.revision).filter(CatalogRevision.id == 1).scalar() or 0
+
+def bump_revision(connection):
+    revision = CatalogRevision.__table__
+    bumped = connection.execute(
+        update(revision)
+        .where(revision.c.id == 1)
+        .values(revision=revision.c.revision + 1, updated_at=datetime.utcnow())
+    ).rowcount
+    if not bumped:
+        connection.execute(revision.insert().values(id=1, revision=1, updated_at=datetime.utcnow()))
+
+@event.listens_for(Engine, "after_execute")
+def _bump_on_catalog_write(connection, clauseelement, multiparams, params, execution_options, result):
+    if not isinstance(clauseelement, UpdateBase) or result.rowcount == 0:
+        return
+    table_name = getattr(clauseelement.table, "name", None)
+    if table_name not in CATALOG_WRITE_TABLES:
+        return
+    if table_name == "ecosystem_interactions" and not _reaches_bundle(clauseelement, result):
+        return
+    bump_revision(connection)
+
+def _reaches_bundle(statement, result):
+    """Whether a write to ecosystem_interactions can change what devices download"""
+    rows = result.context.compiled_parameters
+    if statement.is_insert:
+        # Student submissions arrive unverified and only ship once approved
+        return any(row.get("is_verified") for row in rows)
+    if statement.is_update:
+        return any(SHIPPED_INTERACTION_COLUMNS & row.keys() for row in rows)
+    return True
+
+def _encode(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enum members
+        return value.value
+    return value
+
+def _write_bundle(
+    db: Session, connection: sqlite3.Connection, version: int, since: Optional[int], changed_after: Optional[datetime],
+):
+    connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("schema_version", str(SCHEMA_VERSION)),
+        ("version", str(version)),
+        ("since", str(since or 0)),
+        ("built_at", datetime.utcnow().isoformat()),
+    ])
+
+    for table_name, (model, columns) in CATALOG_TABLES.items():
+        connection.execute(
+            f"CREATE TABLE {table_name} ({', '.join(columns)}, PRIMARY KEY (id))"
+        )
+        condition = _catalog_filter(model)
+        query = select(*[getattr(model, column) for column in columns])
+        if condition is not None:
+            query = query.where(condition)
+        if since:
+            query = query.where(model.last_updated > changed_after)
+        rows = db.execute(query.order_by(model.id)).all()
+        connection.executemany(
+            f"INSERT INTO {table_name} VALUES ({', '.join('?' * len(columns))})",
+            [[_encode(value) for value in row] for row in rows],
+        )
+
+    if since:
+        # Every id still in the catalog, so devices can delete the rest
+        connection.execute("CREATE TABLE catalog_ids (table_name TEXT, id INTEGER)")
+        for table_name, (model, _) in CATALOG_TABLES.items():
+            condition = _catalog_filter(model)
+            query = select(model.id)
+            if condition is not None:
+                query = query.where(condition)
+            connection.executemany(
+                "INSERT INTO catalog_ids VALUES (?, ?)",
+                [(table_name, row_id) for row_id in db.execute(query).scalars()],
+            )
+
+    # Association tables are small integer pairs, so they always ship in full
+    for table_name, table in ASSOCIATION_TABLES.items():
+        columns = [column.name for column in table.columns]
+        connection.execute(f"CREATE TABLE {table_name} ({', '.join(columns)})")
+        connection.executemany(
+            f"INSERT INTO {table_name} VALUES ({', '.join('?' * len(columns))})",
+            db.execute(select(table)).all(),
+        )
+
+def bundle_path(version: int, since: Optional[int] = None, directory: str = SNAPSHOT_DIR) -> str:
+    suffix = f"-since-{since}" if since else ""
+    return os.path.join(directory, f"animaldex-catalog-v{SCHEMA_VERSION}-{version}{suffix}.sqlite.gz")
+
+def _release_path(version: int, directory: str) -> str:
+    return os.path.join(directory, f"release-v{SCHEMA_VERSION}-{version}.json")
+
+def published_at(version: int, directory: str = SNAPSHOT_DIR) -> Optional[datetime]:
+    """When this server first built a bundle for `version`, or None if it never did"""
+    try:
+        with open(_release_path(version, directory)) as release:
+            return datetime.fromisoformat(json.load(release)["published_at"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _publish(version: int, moment: datetime, directory: str):
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".partial", delete=False) as partial:
+        json.dump({"version": version, "published_at": moment.isoformat()}, partial)
+    os.replace(partial.name, _release_path(version, directory))
+
+def build_bundle(db: Session, since: Optional[int] = None, directory: str = SNAPSHOT_DIR):
+    """Build (or reuse) the bundle for the current version
+
+    Returns `(path, version, since)`, where `since` is None for a full bundle.
+    Deltas are only built from versions this server published.
+    """
+    # Taken before reading anything, so rows written after it land in the next delta
+    started_at = datetime.utcnow()
+    version = catalog_version(db)
+    base = published_at(since, directory) if since is not None and since < version else None
+    if base is None:
+        since = None
+    path = bundle_path(version, since, directory)
+
+    os.makedirs(directory, exist_ok=True)
+    if not os.path.exists(path):
+        changed_after = base - timedelta(seconds=SNAPSHOT_DELTA_OVERLAP_SECONDS) if base else None
+        with tempfile.TemporaryDirectory() as scratch:
+            database_path = os.path.join(scratch, "catalog.sqlite")
+            connection = sqlite3.connect(database_path)
+            try:
+                _write_bundle(db, connection, version, since, changed_after)
+                connection.commit()
+                connection.execute("VACUUM")
+            finally:
+                connection.close()
+
+            # Write beside the target and rename so readers never see a partial file
+            with tempfile.NamedTemporaryFile(dir=directory, suffix=".partial", delete=False) as partial:
+                with open(database_path, "rb") as source, gzip.GzipFile(fileobj=partial, mode="wb", compresslevel=9) as target:
+                    shutil.copyfileobj(source, target)
+            os.replace(partial.name, path)
+
+    if published_at(version, directory) is None:
+        _publish(version, started_at, directory)
+    prune_bundles(directory)
+    return path, version, since
+
+def published_bundle(since: Optional[int] = None, directory: str = SNAPSHOT_DIR):
+    """The newest bundle already on disk, as `(path, version, since)`, or None
+
+    Never builds anything, so request handlers can call it; the delta from
+    `since` is returned only if it was built, otherwise the full bundle.
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return None
+    releases = sorted(
+        (int(match.group(1)) for match in map(RELEASE_NAME.match, names) if match), reverse=True,
+    )
+    for version in releases:
+        if os.path.exists(bundle_path(version, directory=directory)):
+            delta = bundle_path(version, since, directory) if since else None
+            if delta and os.path.exists(delta):
+                return delta, version, since
+            return bundle_path(version, directory=directory), version, None
+    return None
+
+BUNDLE_NAME = re.compile(rf"^animaldex-catalog-v{SCHEMA_VERSION}-(\d+)(?:-since-\d+)?\.sqlite\.gz$")
+RELEASE_NAME = re.compile(rf"^release-v{SCHEMA_VERSION}-(\d+)\.json$")
+
+def prune_bundles(directory: str = SNAPSHOT_DIR, keep: int = SNAPSHOT_KEEP):
+    """Keep bundles for the two newest versions and the newest `keep` releases"""
+    def versions(pattern):
+        found = {}
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match:
+                found.setdefault(int(match.group(1)), []).append(os.path.join(directory, name))
+        return found
+
+    # The previous version's files may still be streaming to a device
+    bundles = versions(BUNDLE_NAME)
+    for version in sorted(bundles, reverse=True)[2:]:
+        for path in bundles[version]:
+            os.remove(path)
+
+    releases = versions(RELEASE_NAME)
+    for version in sorted(releases, reverse=True)[keep:]:
+        for path in releases[version]:
+            os.remove(path)
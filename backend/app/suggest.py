@@ -0,0 +1,214 @@
+"""In-memory prefix index for search-box suggestions
+
+Every animal's name, scientific name and common names are normalized and
+stored, together with each word suffix ("gray wolf" is also findable as
+"wolf"), in one sorted array. A prefix lookup bisects to the matching slice
+and ranks it, so a keystroke never reaches the database. Matches are ranked
+by how many students have discovered the animal.
+
+Any prefix matching more than SUGGEST_SCAN_LIMIT entries ("a", "ca", but
+also "cat" in a big catalog) has its best SUGGEST_TOP_K animals precomputed,
+so no lookup ranks more than SUGGEST_SCAN_LIMIT entries and every answer is
+the same as ranking all matches.
+
+The index is loaded once at startup, animals inserted through the ORM are
+added as their transaction commits, and discovery counts (the only part
+written without the ORM) are reloaded in a background thread every
+SUGGEST_REFRESH_SECONDS.
+"""
+from array import array
+from bisect import bisect_left, insort
+from heapq import nsmallest
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+import logging
+import os
+import threading
+import time
+from app.database import open_read_session
+from app.models.models import Animal, user_animal_discoveries
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_REFRESH_SECONDS = float(os.getenv("SUGGEST_REFRESH_SECONDS", "300"))
+# Most suggestions kept per precomputed prefix; larger limits rank every match
+SUGGEST_TOP_K = int(os.getenv("SUGGEST_TOP_K", "20"))
+# Prefixes matching more entries than this are answered from precomputed lists
+SUGGEST_SCAN_LIMIT = int(os.getenv("SUGGEST_SCAN_LIMIT", "5000"))
+
+# Sorts after any character a normalized term can contain
+_LAST_CHARACTER = "\U0010ffff"
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+def _match_range(terms, prefix, start=0, end=None):
+    """Bounds of the slice of sorted `terms` starting with `prefix`"""
+    end = len(terms) if end is None else end
+    start = bisect_left(terms, prefix, start, end)
+    return start, bisect_left(terms, prefix + _LAST_CHARACTER, start, end)
+
+def _terms(names):
+    """Normalized names plus every word-boundary suffix of each"""
+    terms = set()
+    for name in names:
+        words = normalize(name or "").split(" ")
+        for start in range(len(words)):
+            term = " ".join(words[start:])
+            if term:
+                terms.add(term)
+    return terms
+
+class SuggestIndex:
+    def __init__(self, refresh_seconds=SUGGEST_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        # Parallel arrays sorted by term: _terms[i] matches animal _ids[i]
+        self._terms = []
+        self._ids = array("l")
+        self._animals = {}  # id -> (name, scientific_name)
+        self._weights = {}  # id -> discovery count
+        self._top = {}  # prefix matching > SUGGEST_SCAN_LIMIT entries -> best SUGGEST_TOP_K ids
+        self._loaded_at = None
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    def _entries(self, animal_id, names):
+        return [(term, animal_id) for term in _terms(names)]
+
+    def load(self, db: Session):
+        """Build the whole index from the database"""
+        entries = []
+        animals = {}
+        rows = db.execute(
+            select(Animal.id, Animal.name, Animal.scientific_name, Animal.common_names)
+            .execution_options(yield_per=5000)
+        )
+        for animal_id, name, scientific_name, common_names in rows:
+            animals[animal_id] = (name, scientific_name)
+            entries.extend(self._entries(animal_id, [name, scientific_name, *(common_names or [])]))
+        entries.sort()
+        weights = self._load_weights(db)
+        terms = [term for term, _ in entries]
+        ids = array("l", (animal_id for _, animal_id in entries))
+        top = self._precompute(terms, ids, self._rank_key(animals, weights))
+
+        with self._lock:
+            self._terms = terms
+            self._ids = ids
+            self._animals = animals
+            self._weights = weights
+            self._top = top
+            self._loaded_at = time.monotonic()
+        return len(animals)
+
+    @staticmethod
+    def _precompute(terms, ids, rank):
+        """Top lists for every prefix matching more than SUGGEST_SCAN_LIMIT entries"""
+        top = {}
+        # A prefix can only be too broad if its parent is, so walk down from the root
+        broad = [("", 0, len(terms))]
+        while broad:
+            prefix, start, end = broad.pop()
+            if prefix:
+                top[prefix] = nsmallest(SUGGEST_TOP_K, set(ids[start:end]), key=rank)
+            length = len(prefix) + 1
+            position = start
+            while position < end:
+                if len(terms[position]) < length:  # the prefix itself
+                    position += 1
+                    continue
+                child = terms[position][:length]
+                child_start, child_end = _match_range(terms, child, position, end)
+                if child_end - child_start > SUGGEST_SCAN_LIMIT:
+                    broad.append((child, child_start, child_end))
+                position = child_end
+        return top
+
+    @staticmethod
+    def _rank_key(animals, weights):
+        # Most discovered first, then by name; the id keeps ties deterministic
+        return lambda animal_id: (-weights.get(animal_id, 0), animals[animal_id][0], animal_id)
+
+    def _load_weights(self, db: Session):
+        return dict(db.execute(
+            select(user_animal_discoveries.c.animal_id, func.count())
+            .group_by(user_animal_discoveries.c.animal_id)
+        ).all())
+
+    def add(self, animal_id, name, scientific_name, common_names=()):
+        """Index one new animal without rebuilding"""
+        with self._lock:
+            if animal_id in self._animals:
+                return
+            self._animals[animal_id] = (name, scientific_name)
+            prefixes = set()
+            for term, entry_id in self._entries(animal_id, [name, scientific_name, *(common_names or [])]):
+                position = bisect_left(self._terms, term)
+                self._terms.insert(position, term)
+                self._ids.insert(position, entry_id)
+                prefixes.update(term[:length] for length in range(1, len(term) + 1))
+
+            rank = self._rank_key(self._animals, self._weights)
+            for prefix in prefixes:
+                top = self._top.get(prefix)
+                if top is not None:
+                    insort(top, animal_id, key=rank)
+                    del top[SUGGEST_TOP_K:]
+                    continue
+                # This animal may have pushed the prefix over the scan limit
+                start, end = _match_range(self._terms, prefix)
+                if end - start > SUGGEST_SCAN_LIMIT:
+                    self._top[prefix] = nsmallest(SUGGEST_TOP_K, set(self._ids[start:end]), key=rank)
+
+    def suggest(self, prefix, limit=8):
+        """[(id, name, scientific_name), ...] for animals with a name starting with `prefix`"""
+        self._refresh_if_stale()
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is not None and limit <= SUGGEST_TOP_K:
+                best = top[:limit]
+            else:
+                start, end = _match_range(self._terms, prefix)
+                best = nsmallest(limit, set(self._ids[start:end]), key=self._rank_key(self._animals, self._weights))
+            return [(animal_id, *self._animals[animal_id]) for animal_id in best]
+
+    def _refresh_if_stale(self):
+        with self._lock:
+            stale = self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+            if not stale or self._reloading:
+                return
+            self._reloading = True
+        # Keep answering from the current index while the new one loads
+        threading.Thread(target=self._reload, name="suggest-reload", daemon=True).start()
+
+    def _reload(self):
+        try:
+            with open_read_session() as db:
+                self.load(db)
+        except Exception:
+            logger.exception("Could not reload the suggestion index")
+        finally:
+            with self._lock:
+                self._reloading = False
+
+suggest_index = SuggestIndex()
+
+@event.listens_for(Animal, "after_insert")
+def _stash_animal(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("suggest_animals", []).append(
+            (target.id, target.name, target.scientific_name, list(target.common_names or []))
+        )
+
+@event.listens_for(Session, "after_commit")
+def _index_animals(session):
+    for animal in session.info.pop("suggest_animals", []):
+        suggest_index.add(*animal)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_animals(session):
+    session.info.pop("suggest_animals", None)
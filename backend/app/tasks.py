@@ -0,0 +1,144 @@
+"""Maintenance tasks that run on the background job runner instead of in requests"""
+from sqlalchemy import func, insert, select, update
+from datetime import datetime
+from app.database import SessionLocal, engine
+from app.jobs import job
+from app.models.models import (
+    User, UserProgress, EcosystemInteraction, UserConservationAction,
+    QuizAttempt, School, user_animal_discoveries,
+)
+
+# Badge name -> (progress counter, threshold)
+BADGES = {
+    "First Discovery": ("animals_discovered", 1),
+    "Explorer": ("animals_discovered", 10),
+    "Naturalist": ("animals_discovered", 50),
+    "Food Web Builder": ("interactions_created", 5),
+    "Conservation Champion": ("conservation_actions_taken", 5),
+}
+
+@job("seed_database", max_attempts=1)
+def seed_database():
+    import seed_data
+    seed_data.seed_database()
+
+@job("recompute_progress")
+def recompute_progress():
+    """Rebuild every user's progress counters and badges from the activity tables"""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        # Users without a progress row yet get one with the column defaults
+        db.execute(insert(UserProgress).from_select(
+            ["user_id"],
+            select(User.id).where(
+                ~select(UserProgress.id).where(UserProgress.user_id == User.id).exists()
+            ),
+        ))
+
+        def count(table, user_column):
+            return select(func.count()).select_from(table).where(
+                user_column == UserProgress.user_id
+            ).scalar_subquery()
+
+        db.execute(
+            update(UserProgress)
+            .values(
+                animals_discovered=count(user_animal_discoveries, user_animal_discoveries.c.user_id),
+                interactions_created=count(EcosystemInteraction.__table__, EcosystemInteraction.created_by_id),
+                conservation_actions_taken=count(UserConservationAction.__table__, UserConservationAction.user_id),
+                last_updated=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        changed = []
+        rows = db.execute(select(
+            UserProgress.id, UserProgress.badges_earned, UserProgress.animals_discovered,
+            UserProgress.interactions_created, UserProgress.conservation_actions_taken,
+        )).mappings()
+        for row in rows:
+            badges = [name for name, (counter, threshold) in BADGES.items() if (row[counter] or 0) >= threshold]
+            if badges != list(row["badges_earned"] or []):
+                changed.append({"id": row["id"], "badges_earned": badges})
+        if changed:
+            db.execute(update(UserProgress), changed)
+
+        db.commit()
+        return {"badges_changed": len(changed)}
+    finally:
+        db.close()
+
+@job("build_snapshot")
+def build_snapshot(since=None):
+    """Build the current version's full bundle, plus the delta from `since` if given"""
+    from app.snapshot import build_bundle
+    db = SessionLocal()
+    try:
+        path, version, built_since = build_bundle(db)
+        if since is not None:
+            path, version, built_since = build_bundle(db, since=since)
+        return {"path": path, "version": version, "since": built_since}
+    finally:
+        db.close()
+
+@job("auto_verify_interactions")
+def auto_verify_interactions():
+    from app.moderation import auto_verify_pending
+    db = SessionLocal()
+    try:
+        return auto_verify_pending(db).dict()
+    finally:
+        db.close()
+
+@job("rebuild_leaderboard_counters", max_attempts=1)
+def rebuild_leaderboard_counters():
+    """Recount every leaderboard bucket from scratch, e.g. after importing old actions"""
+    from app.leaderboard import rebuild_counters
+    with engine.begin() as connection:
+        return {"counters": rebuild_counters(connection)}
+
+@job("backfill_tenants", max_attempts=1)
+def backfill_tenants():
+    """Create schools from the free-text `User.school` values and stamp school_id everywhere"""
+    db = SessionLocal()
+    try:
+        db.execute(insert(School).from_select(
+            ["name"],
+            select(User.school).where(
+                User.school.is_not(None),
+                User.school != "",
+                ~select(School.id).where(School.name == User.school).exists(),
+            ).distinct(),
+        ))
+        users = db.execute(
+            update(User)
+            .where(User.school_id.is_(None), User.school.is_not(None))
+            .values(school_id=select(School.id).where(School.name == User.school).scalar_subquery())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        def user_school(user_column):
+            return select(User.school_id).where(User.id == user_column).scalar_subquery()
+
+        rows = 0
+        for table in (QuizAttempt.__table__, UserConservationAction.__table__, user_animal_discoveries):
+            rows += db.execute(
+                update(table)
+                .where(table.c.school_id.is_(None))
+                .values(school_id=user_school(table.c.user_id))
+            ).rowcount
+        db.commit()
+    finally:
+        db.close()
+
+    # School leaderboards are keyed by school_id, so recount with the new ids
+    rebuild_leaderboard_counters()
+    return {"users_updated": users, "activity_rows_updated": rows}
+
+@job("refresh_habitat_summaries", max_attempts=1)
+def refresh_habitat_summaries():
+    """Recompute every habitat's animal summary, e.g. after a bulk import"""
+    from app.habitat_summaries import refresh_summaries
+    with engine.begin() as connection:
+        return {"habitats": refresh_summaries(connection)}
@@ -0,0 +1,79 @@
+"""School tenancy for the user activity tables
+
+Activity rows (quiz attempts, conservation actions, discoveries) carry the
+owning user's `school_id`, filled in from the user at insert time, and are
+indexed on (school_id, ...). Per-school endpoints take their session from
+`get_tenant_db`, which adds `school_id = :id` to every ORM query on a
+TenantScoped model or User, so a teacher's query never reads another
+school's rows and never needs the old join through `User.school`.
+
+With TENANT_PARTITIONING=1 on Postgres the activity tables are created
+LIST-partitioned by school_id: each School created through the ORM gets its
+own partitions and a DEFAULT partition catches everything else. Partitioning
+assumes every user already has a school (run the `backfill_tenants` job on
+the unpartitioned tables first).
+"""
+from fastapi import Depends, HTTPException
+from sqlalchemy import DDL, event, text
+from sqlalchemy.orm import Session, with_loader_criteria
+from app.database import SessionLocal, get_db
+from app.models.models import (
+    TENANT_PARTITIONING, School, TenantScoped, QuizAttempt, User, UserConservationAction, user_animal_discoveries,
+)
+
+PARTITIONED_TABLES = [QuizAttempt.__table__, UserConservationAction.__table__, user_animal_discoveries]
+
+# Users carry their own school_id rather than one derived from a user, so they aren't TenantScoped
+TENANT_MODELS = (TenantScoped, User)
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _tenant_filter(execute_state):
+    school_id = execute_state.session.info.get("school_id")
+    if school_id is None or not execute_state.is_select or execute_state.is_column_load:
+        return
+    execute_state.statement = execute_state.statement.options(*[
+        with_loader_criteria(model, lambda cls: cls.school_id == school_id, include_aliases=True)
+        for model in TENANT_MODELS
+    ])
+
+@event.listens_for(SessionLocal, "before_flush")
+def _stamp_school(session, flush_context, instances):
+    school_id = session.info.get("school_id")
+    if school_id is None:
+        return
+    for instance in session.new:
+        if isinstance(instance, TENANT_MODELS) and getattr(instance, "school_id", None) is None:
+            instance.school_id = school_id
+
+def scope_session(db: Session, school_id):
+    """Restrict an open session to one school's rows"""
+    db.info["school_id"] = school_id
+    return db
+
+def get_tenant_db(school_id: int, db: Session = Depends(get_db)):
+    """Session for /schools/{school_id}/... endpoints, filtered to that school"""
+    if db.get(School, school_id) is None:
+        raise HTTPException(status_code=404, detail="School not found")
+    yield scope_session(db, school_id)
+
+def partition_name(table, school_id):
+    return f"{table.name}_school_{int(school_id)}"
+
+if TENANT_PARTITIONING:
+    for _table in PARTITIONED_TABLES:
+        event.listen(
+            _table,
+            "after_create",
+            DDL(f"CREATE TABLE IF NOT EXISTS {_table.name}_default PARTITION OF {_table.name} DEFAULT")
+            .execute_if(dialect="postgresql"),
+        )
+
+    @event.listens_for(School, "after_insert")
+    def _create_school_partitions(mapper, connection, target):
+        if connection.dialect.name != "postgresql":
+            return
+        for table in PARTITIONED_TABLES:
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(table, target.id)} "
+                f"PARTITION OF {table.name} FOR VALUES IN ({int(target.id)})"
+            ))
@@ -0,0 +1,89 @@
+"""Bytes on the wire and CPU cost per request for each response encoding
+
+    python -m benchmarks.compression
+    python -m benchmarks.compression --save-baseline
+
+For every catalog endpoint this replays the same request with no
+compression, gzip and (when installed) brotli, both with a cold and a warm
+precompressed cache, and once more as an If-None-Match revalidation.
+CPU time is process time for the whole in-process request, so it includes
+routing, the query and serialization as well as compression.
+"""
+from benchmarks import settings
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import httpx
+from app.compression import brotli, precompressed_cache
+
+ENDPOINTS = [
+    "/api/animals/?limit=100",
+    "/api/animals/1",
+    "/api/animals/1/facts",
+    "/api/habitats/",
+    "/api/conservation-efforts/",
+]
+
+BASELINE_PATH = os.path.join(settings.BENCHMARK_DIR, "compression_baseline.json")
+
+async def _measure(client, path, headers, repeat):
+    wire_bytes = 0
+    status = None
+    started = time.process_time()
+    for _ in range(repeat):
+        async with client.stream("GET", path, headers=headers) as response:
+            status = response.status_code
+            wire_bytes = sum([len(chunk) async for chunk in response.aiter_raw()])
+    cpu_ms = (time.process_time() - started) * 1000 / repeat
+    return {"status": status, "bytes": wire_bytes, "cpu_ms": round(cpu_ms, 3)}
+
+async def run(repeat=200):
+    import main
+    encodings = {"identity": "identity", "gzip": "gzip"}
+    if brotli is not None:
+        encodings["br"] = "br"
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://animaldex.test") as client:
+            for path in ENDPOINTS:
+                results[path] = {}
+                for label, accept in encodings.items():
+                    headers = {"Accept-Encoding": accept}
+                    precompressed_cache.clear()
+                    results[path][f"{label}_cold"] = await _measure(client, path, headers, 1)
+                    results[path][label] = await _measure(client, path, headers, repeat)
+
+                etag = (await client.get(path, headers={"Accept-Encoding": "gzip"})).headers.get("etag")
+                if etag:
+                    results[path]["revalidate_304"] = await _measure(
+                        client, path, {"Accept-Encoding": "gzip", "If-None-Match": etag}, repeat
+                    )
+    return results
+
+def print_table(results):
+    print(f"{'endpoint':<28} {'variant':<16} {'status':>6} {'bytes':>9} {'cpu ms':>8}")
+    for path, variants in results.items():
+        for variant, measurement in variants.items():
+            print(f"{path:<28} {variant:<16} {measurement['status']:>6} {measurement['bytes']:>9} {measurement['cpu_ms']:>8.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression and conditional requests")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.repeat))
+    print_table(results)
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"✅ Saved {BASELINE_PATH}")
+
+if __name__ == "__main__":
+    main()
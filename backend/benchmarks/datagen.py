@@ -0,0 +1,240 @@
+"""Synthetic AnimalDex data at a configurable scale
+
+    python -m benchmarks.datagen --scale 1 --reset
+"""
+from benchmarks import settings  # noqa: F401  (must come before app imports)
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import insert, text
+from app.database import engine
+from app.habitat_summaries import refresh_summaries
+from app.leaderboard import rebuild_counters
+import app.snapshot  # noqa: F401  (bumps the catalog revision on catalog writes)
+from app.models.models import (
+    Base, Animal, Habitat, ConservationEffort, EcosystemInteraction, User,
+    UserConservationAction, Quiz, QuizAttempt, School, UserRole, ConservationStatus,
+    EcosystemRelationType, animal_habitats, user_animal_discoveries,
+)
+
+# Row counts at scale 1; every count grows linearly with --scale
+BASE_COUNTS = {
+    "habitats": 10,
+    "animals": 500,
+    "conservation_efforts": 20,
+    "users": 1000,
+    "interactions": 2000,
+    "quizzes": 10,
+    "quiz_attempts": 5000,
+    "conservation_actions": 5000,
+    "discoveries": 10000,
+}
+
+SYLLABLES = ["ar", "ba", "cor", "da", "el", "fa", "gor", "hi", "is", "ju", "ka", "lo", "mar", "no", "pa", "qui", "ra", "sa", "tu", "vo", "wa", "xe", "ya", "zo"]
+DIETS = ["Carnivore", "Herbivore", "Omnivore"]
+ACTION_TYPES = ["petition_signed", "learned_about", "shared"]
+SCHOOLS = [f"School {n}" for n in range(25)]
+
+def scaled_counts(scale):
+    return {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+
+def _word(rng, syllables=3):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+def _sentences(rng, count, words=12):
+    return [" ".join(_word(rng, 2) for _ in range(words)).capitalize() + "." for _ in range(count)]
+
+def _insert(connection, table, rows, chunk_size=1000):
+    for start in range(0, len(rows), chunk_size):
+        connection.execute(insert(table), rows[start:start + chunk_size])
+
+def _with_schools(user_schools, rows):
+    for row in rows:
+        row["school_id"] = user_schools[row["user_id"]]
+    return rows
+
+def _sync_sequences(connection, tables):
+    # Explicit ids leave Postgres sequences behind; move them past the generated rows
+    if connection.dialect.name != "postgresql":
+        return
+    for table in tables:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+        ))
+
+def generate(scale=1.0, seed=42):
+    """Insert synthetic rows into an empty database and return the row counts"""
+    rng = random.Random(seed)
+    counts = scaled_counts(scale)
+    now = datetime.utcnow()
+    statuses = list(ConservationStatus)
+    relation_types = list(EcosystemRelationType)
+
+    with engine.begin() as connection:
+        _insert(connection, Habitat.__table__, [
+            {
+                "id": habitat_id,
+                "name": f"Habitat {habitat_id} {_word(rng).title()}",
+                "description": " ".join(_sentences(rng, 2)),
+                "climate": rng.choice(["Polar", "Tropical", "Temperate", "Arid"]),
+                "geography": _word(rng).title(),
+                "key_characteristics": [_word(rng) for _ in range(3)],
+                "image_url": f"https://images.example.org/habitats/{habitat_id}.jpg",
+            }
+            for habitat_id in range(1, counts["habitats"] + 1)
+        ])
+
+        _insert(connection, Animal.__table__, [
+            {
+                "id": animal_id,
+                "name": f"{_word(rng).title()} {_word(rng, 2).title()}",
+                "scientific_name": f"{_word(rng).title()} {_word(rng)} {animal_id}",
+                "common_names": [_word(rng).title() for _ in range(rng.randint(1, 3))],
+                "conservation_status": rng.choice(statuses),
+                "description": " ".join(_sentences(rng, rng.randint(3, 8))),
+                "fun_facts": _sentences(rng, rng.randint(2, 6)),
+                "diet": rng.choice(DIETS),
+                "lifespan": f"{rng.randint(1, 20)}-{rng.randint(21, 80)} years",
+                "image_urls": [f"https://images.example.org/{animal_id}/{n}.jpg" for n in range(2)],
+                "video_urls": [],
+                "audio_urls": [],
+                "last_updated": now - timedelta(minutes=rng.randint(0, 100000)),
+            }
+            for animal_id in range(1, counts["animals"] + 1)
+        ])
+
+        _insert(connection, animal_habitats, [
+            {"animal_id": animal_id, "habitat_id": habitat_id}
+            for animal_id in range(1, counts["animals"] + 1)
+            for habitat_id in rng.sample(range(1, counts["habitats"] + 1), min(2, counts["habitats"]))
+        ])
+
+        _insert(connection, ConservationEffort.__table__, [
+            {
+                "id": effort_id,
+                "title": f"{_word(rng).title()} Restoration {effort_id}",
+                "description": " ".join(_sentences(rng, 3)),
+                "organization_name": f"{_word(rng).title()} Foundation",
+                "website_url": f"https://conservation.example.org/{effort_id}",
+                "image_url": f"https://images.example.org/efforts/{effort_id}.jpg",
+                "location": _word(rng).title(),
+                "conservation_problem": " ".join(_sentences(rng, 2)),
+                "current_status": "Active",
+                "is_active": True,
+            }
+            for effort_id in range(1, counts["conservation_efforts"] + 1)
+        ])
+
+        _insert(connection, School.__table__, [
+            {"id": school_id, "name": name, "district": f"District {school_id % 5 + 1}"}
+            for school_id, name in enumerate(SCHOOLS, start=1)
+        ])
+
+        # Activity rows carry their user's school; setting it here skips the per-statement lookup
+        user_schools = {user_id: rng.randint(1, len(SCHOOLS)) for user_id in range(1, counts["users"] + 1)}
+
+        _insert(connection, User.__table__, [
+            {
+                "id": user_id,
+                "email": f"student{user_id}@example.org",
+                "username": f"student{user_id}",
+                "hashed_password": "not-a-real-hash",
+                "role": UserRole.STUDENT,
+                "school": SCHOOLS[school_id - 1],
+                "school_id": school_id,
+                "grade_level": str(rng.randint(6, 8)),
+                "is_active": True,
+            }
+            for user_id, school_id in user_schools.items()
+        ])
+
+        _insert(connection, EcosystemInteraction.__table__, [
+            {
+                "predator_id": rng.randint(1, counts["animals"]),
+                "prey_id": rng.randint(1, counts["animals"]),
+                "interaction_type": rng.choice(relation_types),
+                "habitat_id": rng.randint(1, counts["habitats"]),
+                "strength": rng.randint(1, 5),
+                "created_by_id": rng.randint(1, counts["users"]),
+                "is_verified": rng.random() < 0.3,
+                "created_at": now - timedelta(minutes=rng.randint(0, 100000)),
+            }
+            for _ in range(counts["interactions"])
+        ])
+
+        _insert(connection, Quiz.__table__, [
+            {
+                "id": quiz_id,
+                "title": f"Quiz {quiz_id}",
+                "ngss_standard": rng.choice(["MS-LS2-2", "MS-LS2-5"]),
+                "difficulty_level": rng.choice(["beginner", "intermediate", "advanced"]),
+                "questions": [{"prompt": sentence, "answer": 0} for sentence in _sentences(rng, 5)],
+                "is_published": True,
+            }
+            for quiz_id in range(1, counts["quizzes"] + 1)
+        ])
+
+        _insert(connection, QuizAttempt.__table__, _with_schools(user_schools, [
+            {
+                "user_id": rng.randint(1, counts["users"]),
+                "quiz_id": rng.randint(1, counts["quizzes"]),
+                "score": rng.randint(0, 5),
+                "max_score": 5,
+                "answers": [rng.randint(0, 3) for _ in range(5)],
+                "completed_at": now - timedelta(minutes=rng.randint(0, 100000)),
+                "time_taken": rng.randint(30, 900),
+            }
+            for _ in range(counts["quiz_attempts"])
+        ]))
+
+        _insert(connection, UserConservationAction.__table__, _with_schools(user_schools, [
+            {
+                "user_id": rng.randint(1, counts["users"]),
+                "conservation_effort_id": rng.randint(1, counts["conservation_efforts"]),
+                "action_type": rng.choice(ACTION_TYPES),
+                "completed_at": now - timedelta(minutes=rng.randint(0, 100000)),
+            }
+            for _ in range(counts["conservation_actions"])
+        ]))
+
+        _insert(connection, user_animal_discoveries, _with_schools(user_schools, [
+            {
+                "user_id": rng.randint(1, counts["users"]),
+                # Skewed so a few animals are much more popular than the rest
+                "animal_id": min(counts["animals"], int(rng.paretovariate(1.2))),
+                "discovered_at": now - timedelta(minutes=rng.randint(0, 100000)),
+            }
+            for _ in range(counts["discoveries"])
+        ]))
+
+        # Core inserts skip the ORM hooks that maintain the habitat summaries and leaderboard counters
+        refresh_summaries(connection)
+        rebuild_counters(connection)
+
+        _sync_sequences(connection, [
+            Habitat.__table__, Animal.__table__, ConservationEffort.__table__,
+            School.__table__, User.__table__, Quiz.__table__,
+        ])
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic AnimalDex data")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for every row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args()
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    counts = generate(scale=args.scale, seed=args.seed)
+    print(f"✅ Generated synthetic data in {settings.BENCH_DATABASE_URL}")
+    for name, count in counts.items():
+        print(f"   {name}: {count}")
+
+if __name__ == "__main__":
+    main()
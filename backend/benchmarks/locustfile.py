@@ -0,0 +1,30 @@
+"""Locust driver replaying the same scenario mixes as benchmarks.run
+
+    BENCH_MIX=classroom locust -f benchmarks/locustfile.py --host http://localhost:8000
+
+Locust is not a project dependency; install it separately to use this file.
+"""
+import os
+import random
+from locust import HttpUser, between, task
+from benchmarks.scenarios import SCENARIOS, pick
+
+BENCH_MIX = os.getenv("BENCH_MIX", "classroom")
+BENCH_ANIMALS = int(os.getenv("BENCH_ANIMALS", "500"))
+
+class ClassroomUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.rng = random.Random()
+        self.context = {"animals": BENCH_ANIMALS, "hot_animal": 1}
+        self.classroom = str(self.rng.randint(1, 10))
+
+    @task
+    def replay(self):
+        name = pick(self.rng, BENCH_MIX)
+        method, path, body = SCENARIOS[name](self.rng, self.context)
+        self.client.request(
+            method, path, json=body, name=name,
+            headers={"X-Classroom-Id": self.classroom},
+        )
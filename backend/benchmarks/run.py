@@ -0,0 +1,168 @@
+"""asyncio load driver for the AnimalDex API
+
+Runs a scenario mix against the app in-process (no network) or against a
+running server, reports latency percentiles per scenario, and compares the
+result with the checked-in baseline:
+
+    python -m benchmarks.datagen --reset
+    python -m benchmarks.run --mix classroom --compare
+    python -m benchmarks.run --mix classroom --save-baseline
+"""
+from benchmarks import settings
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import httpx
+from sqlalchemy import func
+from app.database import SessionLocal, engine
+from app.models.models import Animal
+from benchmarks.scenarios import MIXES, SCENARIOS, pick
+
+def dataset_context():
+    db = SessionLocal()
+    try:
+        animals = db.query(func.max(Animal.id)).scalar() or 1
+    finally:
+        db.close()
+    return {"animals": animals, "hot_animal": 1}
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(latencies, errors):
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+async def _worker(client, rng, mix, context, remaining, samples, errors, classroom):
+    headers = {"X-Classroom-Id": classroom}
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        name = pick(rng, mix)
+        method, path, body = SCENARIOS[name](rng, context)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body, headers=headers)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        samples.setdefault(name, []).append(time.perf_counter() - started)
+        if failed:
+            errors[name] = errors.get(name, 0) + 1
+
+async def _drive(client, mix, requests, concurrency, seed, context):
+    samples, errors = {}, {}
+    remaining = [requests]
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _worker(client, random.Random(seed + n), mix, context, remaining, samples, errors, str(n % 10))
+        for n in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+    every_sample = [latency for latencies in samples.values() for latency in latencies]
+    return {
+        "meta": {
+            "mix": mix,
+            "requests": requests,
+            "concurrency": concurrency,
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+        },
+        "overall": {
+            "requests_per_second": round(len(every_sample) / elapsed, 1),
+            **summarize(every_sample, sum(errors.values())),
+        },
+        "scenarios": {
+            name: summarize(latencies, errors.get(name, 0))
+            for name, latencies in sorted(samples.items())
+        },
+    }
+
+async def run(mix, requests=2000, concurrency=20, seed=1, url=None, warmup=100):
+    """Replay `requests` requests from `mix` and return the summarized results"""
+    context = dataset_context()
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+            await _drive(client, mix, warmup, concurrency, seed + 1000, context)
+            return await _drive(client, mix, requests, concurrency, seed, context)
+
+    import main
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://animaldex.test") as client:
+            await _drive(client, mix, warmup, concurrency, seed + 1000, context)
+            return await _drive(client, mix, requests, concurrency, seed, context)
+
+def load_baseline(path=settings.BASELINE_PATH):
+    try:
+        with open(path) as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(result, path=settings.BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline[result["meta"]["mix"]] = result
+    with open(path, "w") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write("\n")
+
+def compare(result, baseline, tolerance):
+    """Print p95 changes per scenario and return the scenarios that regressed"""
+    regressions = []
+    previous = baseline.get(result["meta"]["mix"])
+    if not previous:
+        print(f"⚠️  No baseline for mix '{result['meta']['mix']}'")
+        return regressions
+
+    for name, current in result["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if not before:
+            continue
+        change = current["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0
+        marker = "❌" if change > tolerance else "✅"
+        print(f"{marker} {name:<22} p95 {before['p95_ms']:>9.2f}ms -> {current['p95_ms']:>9.2f}ms ({change:+.0%})")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AnimalDex API")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="classroom")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--output", help="Write the results JSON to this path")
+    parser.add_argument("--compare", action="store_true", help="Compare p95 latencies with the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 slowdown before failing")
+    parser.add_argument("--save-baseline", action="store_true", help="Record this run as the baseline for its mix")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.mix, args.requests, args.concurrency, args.seed, args.url))
+    print(json.dumps(result["overall"], indent=2))
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(result, output_file, indent=2)
+    if args.save_baseline:
+        save_baseline(result)
+        print(f"✅ Saved baseline for mix '{args.mix}'")
+    if args.compare and compare(result, load_baseline(), args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
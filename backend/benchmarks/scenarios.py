@@ -0,0 +1,92 @@
+"""Request scenarios and the read/write mixes built from them
+
+Each scenario takes a random generator and the dataset context and returns
+`(method, path, json_body)`. Drivers only need this module, so the asyncio
+runner and the Locust file replay exactly the same traffic.
+"""
+import uuid
+
+SEARCH_TERMS = ["ar", "ba", "cor", "fox", "ma", "zo", "qui", "el"]
+STATUSES = ["Least Concern", "Vulnerable", "Endangered", "Critically Endangered"]
+
+def browse(rng, context):
+    skip = rng.randint(0, max(0, context["animals"] - 20))
+    return "GET", f"/api/animals/?skip={skip}&limit=20", None
+
+def search(rng, context):
+    return "GET", f"/api/animals/?search={rng.choice(SEARCH_TERMS)}&limit=20", None
+
+def filter_status(rng, context):
+    return "GET", f"/api/animals/?conservation_status={rng.choice(STATUSES)}&limit=20", None
+
+def suggest(rng, context):
+    # One keystroke of a search-box typeahead
+    term = rng.choice(SEARCH_TERMS)
+    return "GET", f"/api/animals/suggest?q={term[:rng.randint(1, len(term))]}", None
+
+def random_animal(rng, context):
+    return "GET", "/api/animals/random", None
+
+def detail(rng, context):
+    return "GET", f"/api/animals/{rng.randint(1, context['animals'])}", None
+
+def hot_detail(rng, context):
+    # A whole classroom looking at the same projected animal
+    return "GET", f"/api/animals/{context['hot_animal']}", None
+
+def facts(rng, context):
+    return "GET", f"/api/animals/{rng.randint(1, context['animals'])}/facts", None
+
+def create(rng, context):
+    suffix = uuid.uuid4().hex[:12]
+    return "POST", "/api/animals/", {
+        "name": f"Benchmark Animal {suffix}",
+        "scientific_name": f"Benchmarkus {suffix}",
+        "common_names": [f"Bench {suffix}"],
+        "description": "Created by the benchmark suite.",
+        "fun_facts": ["It exists only to be measured."],
+        "diet": rng.choice(["Carnivore", "Herbivore", "Omnivore"]),
+    }
+
+def habitats(rng, context):
+    return "GET", "/api/habitats/", None
+
+def conservation_efforts(rng, context):
+    return "GET", "/api/conservation-efforts/", None
+
+def leaderboard(rng, context):
+    scope = rng.choice(["effort", "school"])
+    period = rng.choice(["day", "week"])
+    return "GET", f"/api/conservation-efforts/leaderboard?scope={scope}&period={period}", None
+
+SCENARIOS = {
+    "browse": browse,
+    "search": search,
+    "filter_status": filter_status,
+    "suggest": suggest,
+    "random": random_animal,
+    "detail": detail,
+    "hot_detail": hot_detail,
+    "facts": facts,
+    "create": create,
+    "habitats": habitats,
+    "conservation_efforts": conservation_efforts,
+    "leaderboard": leaderboard,
+}
+
+# Relative weights of each scenario in a run
+MIXES = {
+    "animals": {"browse": 3, "search": 2, "filter_status": 1, "random": 1, "detail": 3, "facts": 1, "create": 1},
+    "habitats": {"habitats": 1},
+    "conservation_efforts": {"conservation_efforts": 1},
+    "classroom": {"browse": 25, "search": 20, "detail": 30, "facts": 5, "random": 5, "habitats": 10, "conservation_efforts": 5},
+    "projected": {"hot_detail": 9, "facts": 1},
+    "write_heavy": {"browse": 4, "detail": 4, "create": 2},
+    "typeahead": {"suggest": 1},
+    "leaderboard": {"leaderboard": 1},
+}
+
+def pick(rng, mix):
+    """Choose a scenario name from a mix according to its weights"""
+    weights = MIXES[mix]
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
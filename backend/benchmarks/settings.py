@@ -0,0 +1,16 @@
+"""Shared benchmark settings; import this before anything from `app`"""
+import os
+
+# Benchmarks never touch the database from .env; they get their own local one
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+
+# Rate limiting would turn a load test into a test of the limiter
+os.environ.setdefault("RATE_LIMIT_PER_SECOND", "1000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "1000000")
+
+# Keep background job polling out of the measurements
+os.environ.setdefault("JOB_RUNNER_ENABLED", "0")
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
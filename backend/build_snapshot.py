@@ -0,0 +1,27 @@
+import argparse
+from app.database import SessionLocal
+from app.snapshot import SNAPSHOT_DIR, build_bundle
+
+def build_snapshot(since=None, directory=SNAPSHOT_DIR):
+    """Build the offline catalog bundle (and optionally a delta) ahead of device syncs"""
+    db = SessionLocal()
+    
+    try:
+        path, version, since = build_bundle(db, since=since, directory=directory)
+        kind = f"delta since {since}" if since else "full"
+        print(f"✅ Built {kind} snapshot version {version}: {path}")
+        return path
+    
+    except Exception as e:
+        print(f"❌ Error building snapshot: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an offline catalog snapshot bundle")
+    parser.add_argument("--since", type=int, help="Build a delta against this catalog version")
+    parser.add_argument("--directory", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+    
+    build_snapshot(since=args.since, directory=args.directory)
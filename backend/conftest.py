@@ -0,0 +1,33 @@
+"""Shared pytest setup: every test runs against a throwaway SQLite database"""
+import os
+import shutil
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix="animaldex-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["JOB_RUNNER_ENABLED"] = "0"
+os.environ["SNAPSHOT_DIR"] = os.path.join(_scratch, "snapshots")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.database import SessionLocal, engine
+from app.models.models import Base
+
+@pytest.fixture
+def db():
+    # Revisions restart with the database, so bundles from earlier tests must go too
+    shutil.rmtree(os.environ["SNAPSHOT_DIR"], ignore_errors=True)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client(db):
+    from main import app
+    with TestClient(app) as test_client:
+        yield test_client
@@ -1,39 +1,71 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from app.routers import animals, habitats, conservation_efforts
+from app.routers import animals, habitats, conservation_efforts, ecosystem_interactions, jobs, moderation, schools, snapshots
 
-from app.database import engine
+from app.compression import CompressionMiddleware
+from app.database import engine, mark_recent_write, open_read_session
+from app.habitat_summaries import refresh_missing
+from app.jobs import JOB_RUNNER_ENABLED, job_runner
+from app.suggest import suggest_index
 from app.models import models
 
 models.Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with engine.begin() as connection:
+        refresh_missing(connection)
+    with open_read_session() as db:
+        suggest_index.load(db)
+    if JOB_RUNNER_ENABLED:
+        job_runner.start()
+    yield
+    job_runner.stop()
+
 app = FastAPI(
     title="AnimalDex API",
     description="Educational wildlife platform API for ecosystem learning and conservation action",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
         "http://localhost:3000",  # Next.js dev server
-        "https://animaldex.vercel.app",  # Production frontend
-        "https://*.vercel.app"  # Any Vercel preview deployments
+        "https://animaldex.vercel.app"  # Production frontend
     ],
+    allow_origin_regex=r"https://.*\.vercel\.app",  # Any Vercel preview deployments
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Keep a client's reads on the primary right after a successful write"""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        mark_recent_write(response)
+    return response
+
 app.include_router(animals.router, prefix="/api/animals", tags=["Animals"])
 app.include_router(habitats.router, prefix="/api/habitats", tags=["Habitats"])
 app.include_router(conservation_efforts.router, prefix="/api/conservation-efforts", tags=["Conservation Efforts"])
+app.include_router(ecosystem_interactions.router, prefix="/api/ecosystem-interactions", tags=["Ecosystem Interactions"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Background Jobs"])
+app.include_router(moderation.router, prefix="/api/moderation", tags=["Moderation"])
+app.include_router(snapshots.router, prefix="/api/snapshots", tags=["Offline Snapshots"])
+app.include_router(schools.router, prefix="/api/schools", tags=["Schools"])
 
 @app.get("/")
 async def root():
@@ -45,7 +77,8 @@ async def root():
             "Animal Discovery",
             "Ecosystem Interactions (MS-LS2-2)",
             "Conservation Action Center (MS-LS2-5)",
-            "Educational Progress Tracking"
+            "Educational Progress Tracking",
+            "Offline Classroom Snapshots"
         ]
     }
 
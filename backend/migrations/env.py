@@ -0,0 +1,33 @@
+"""Alembic environment: migrates the database named by DATABASE_URL"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool
+from dotenv import load_dotenv
+import os
+from app.models.models import Base
+
+load_dotenv()
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def _database_url():
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL environment variable is not set")
+    return url
+
+def run_migrations_online():
+    connectable = create_engine(_database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    # Migrations inspect the live schema to skip what create_all() already made
+    raise SystemExit("Offline (--sql) migrations are not supported; run against the database")
+run_migrations_online()
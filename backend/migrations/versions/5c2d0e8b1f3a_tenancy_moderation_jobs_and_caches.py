@@ -0,0 +1,274 @@
+"""Schools, moderation queue, background jobs, leaderboards and catalog caches
+
+Brings a database created from the original models up to date. Every step
+checks the live schema first, because `create_all()` at app startup may
+already have created the new tables (but never adds columns to old ones).
+
+Revision ID: 5c2d0e8b1f3a
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "5c2d0e8b1f3a"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+StringArray = sa.ARRAY(sa.String).with_variant(sa.JSON(), "sqlite")
+# Created with the original tables, so it must not be created again on Postgres
+relation_type = postgresql.ENUM(
+    "PREDATOR_PREY", "COMPETITION", "MUTUALISM", "COMMENSALISM", "PARASITISM",
+    name="ecosystemrelationtype", create_type=False,
+)
+moderation_status = sa.Enum("PENDING", "APPROVED", "REJECTED", name="moderationstatus")
+job_status = sa.Enum("PENDING", "RUNNING", "SUCCEEDED", "FAILED", name="jobstatus")
+
+ACTIVITY_TABLES = ("quiz_attempts", "user_conservation_actions", "user_animal_discoveries")
+STAMPED_TABLES = ("habitats", "conservation_efforts", "ecosystem_interactions")
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+def _has_table(table):
+    return _inspector().has_table(table)
+
+def _columns(table):
+    return {column["name"] for column in _inspector().get_columns(table)}
+
+def _create_table(table, *columns, **kwargs):
+    if not _has_table(table):
+        op.create_table(table, *columns, **kwargs)
+
+def _add_column(table, column):
+    if column.name in _columns(table):
+        return
+    # SQLite cannot ALTER in a foreign key, so batch mode rebuilds the table there (and needs the FK named)
+    with op.batch_alter_table(table) as batch:
+        batch.add_column(column)
+
+def _create_index(name, table, columns, **kwargs):
+    if name not in {index["name"] for index in _inspector().get_indexes(table)}:
+        op.create_index(name, table, columns, **kwargs)
+
+def _create_tables():
+    _create_table(
+        "schools",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False, unique=True),
+        sa.Column("district", sa.String, nullable=True),
+        sa.Column("created_at", sa.DateTime),
+    )
+    _create_index("ix_schools_id", "schools", ["id"])
+
+    _create_table(
+        "habitat_animal_summaries",
+        sa.Column("habitat_id", sa.Integer, sa.ForeignKey("habitats.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("animal_count", sa.Integer, nullable=False),
+        sa.Column("threatened_count", sa.Integer, nullable=False),
+        sa.Column("status_counts", sa.JSON),
+        sa.Column("thumbnail_urls", StringArray),
+        sa.Column("refreshed_at", sa.DateTime),
+    )
+    _create_index("ix_habitat_animal_summaries_refreshed_at", "habitat_animal_summaries", ["refreshed_at"])
+
+    _create_table(
+        "interaction_candidates",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("edge_key", sa.String, nullable=False),
+        sa.Column("predator_id", sa.Integer, sa.ForeignKey("animals.id"), nullable=True),
+        sa.Column("prey_id", sa.Integer, sa.ForeignKey("animals.id"), nullable=True),
+        sa.Column("interaction_type", relation_type, nullable=False),
+        sa.Column("habitat_id", sa.Integer, sa.ForeignKey("habitats.id"), nullable=True),
+        sa.Column("vote_count", sa.Integer, nullable=False),
+        sa.Column("status", moderation_status, nullable=False),
+        sa.Column("auto_verified", sa.Boolean),
+        sa.Column("reviewed_by_id", sa.Integer, sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("reviewed_at", sa.DateTime, nullable=True),
+        sa.Column("first_submitted_at", sa.DateTime),
+        sa.Column("last_submitted_at", sa.DateTime),
+    )
+    _create_index("ix_interaction_candidates_id", "interaction_candidates", ["id"])
+    _create_index("ix_interaction_candidates_queue", "interaction_candidates", ["status", "vote_count"])
+
+    _create_table(
+        "conservation_action_counters",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("period", sa.String, nullable=False),
+        sa.Column("bucket_start", sa.DateTime, nullable=False),
+        sa.Column("conservation_effort_id", sa.Integer, sa.ForeignKey("conservation_efforts.id"), nullable=False),
+        sa.Column("school_id", sa.Integer, nullable=False),
+        sa.Column("action_type", sa.String, nullable=False),
+        sa.Column("count", sa.Integer, nullable=False),
+        sa.UniqueConstraint(
+            "period", "bucket_start", "conservation_effort_id", "school_id", "action_type",
+            name="uq_conservation_action_counter_bucket",
+        ),
+    )
+    _create_index("ix_conservation_action_counters_id", "conservation_action_counters", ["id"])
+
+    _create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String, primary_key=True),
+        sa.Column("tokens", sa.Float, nullable=False),
+        sa.Column("updated_at", sa.Float, nullable=False),
+    )
+
+    _create_table(
+        "catalog_revisions",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("revision", sa.Integer, nullable=False),
+        sa.Column("updated_at", sa.DateTime),
+    )
+
+    _create_table(
+        "background_jobs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("args", sa.JSON),
+        sa.Column("dedupe_key", sa.String, nullable=True),
+        sa.Column("status", job_status, nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False),
+        sa.Column("max_attempts", sa.Integer, nullable=False),
+        sa.Column("run_after", sa.DateTime, nullable=False),
+        sa.Column("last_error", sa.Text, nullable=True),
+        sa.Column("result", sa.JSON, nullable=True),
+        sa.Column("locked_by", sa.String, nullable=True),
+        sa.Column("created_at", sa.DateTime),
+        sa.Column("started_at", sa.DateTime, nullable=True),
+        sa.Column("finished_at", sa.DateTime, nullable=True),
+    )
+    _create_index("ix_background_jobs_id", "background_jobs", ["id"])
+    _create_index("ix_background_jobs_name", "background_jobs", ["name"])
+    _create_index("ix_background_jobs_queue", "background_jobs", ["status", "run_after"])
+    _create_index(
+        "uq_background_jobs_pending_dedupe", "background_jobs", ["dedupe_key"], unique=True,
+        postgresql_where=sa.text("status = 'PENDING'"), sqlite_where=sa.text("status = 'PENDING'"),
+    )
+
+def _upgrade_candidates():
+    """Give candidates created before edge_key existed their key, merging duplicates"""
+    if "edge_key" not in _columns("interaction_candidates"):
+        with op.batch_alter_table("interaction_candidates") as batch:
+            batch.add_column(sa.Column("edge_key", sa.String, nullable=True))
+
+    connection = op.get_bind()
+    candidates = sa.table(
+        "interaction_candidates",
+        sa.column("id"), sa.column("edge_key"), sa.column("predator_id"), sa.column("prey_id"),
+        sa.column("interaction_type"), sa.column("habitat_id"), sa.column("vote_count"),
+    )
+    interactions = sa.table("ecosystem_interactions", sa.column("candidate_id"))
+    rows = connection.execute(
+        sa.select(candidates).where(candidates.c.edge_key.is_(None)).order_by(candidates.c.id)
+    ).all()
+    keep = {}
+    for row in rows:
+        # Same format as app.models.models.interaction_edge_key; the enum is stored by name
+        edge_type = row.interaction_type.lower() if isinstance(row.interaction_type, str) else row.interaction_type
+        key = ":".join("-" if part is None else str(part) for part in (
+            row.predator_id, row.prey_id, edge_type, row.habitat_id,
+        ))
+        if key not in keep:
+            keep[key] = row.id
+            connection.execute(candidates.update().where(candidates.c.id == row.id).values(edge_key=key))
+            continue
+        # Duplicate left by the old NULL-blind unique constraint: fold its votes into the first one
+        connection.execute(
+            candidates.update().where(candidates.c.id == keep[key])
+            .values(vote_count=candidates.c.vote_count + row.vote_count)
+        )
+        connection.execute(
+            interactions.update().where(interactions.c.candidate_id == row.id).values(candidate_id=keep[key])
+        )
+        connection.execute(candidates.delete().where(candidates.c.id == row.id))
+
+    old_constraints = {
+        constraint["name"] for constraint in _inspector().get_unique_constraints("interaction_candidates")
+    }
+    with op.batch_alter_table("interaction_candidates") as batch:
+        batch.alter_column("edge_key", existing_type=sa.String, nullable=False)
+        if "uq_interaction_candidate_edge" in old_constraints:
+            batch.drop_constraint("uq_interaction_candidate_edge", type_="unique")
+    _create_index("uq_interaction_candidates_edge_key", "interaction_candidates", ["edge_key"], unique=True)
+
+def upgrade():
+    _create_tables()
+
+    # Tenancy
+    for table in ("users", *ACTIVITY_TABLES):
+        _add_column(table, sa.Column(
+            "school_id", sa.Integer, sa.ForeignKey("schools.id", name=f"fk_{table}_school_id"), nullable=True,
+        ))
+    _create_index("ix_users_school_role", "users", ["school_id", "role"])
+    for table in ACTIVITY_TABLES:
+        _create_index(f"ix_{table}_school_user", table, ["school_id", "user_id"])
+    _create_index("ix_quiz_attempts_school_completed", "quiz_attempts", ["school_id", "completed_at"])
+    _create_index(
+        "ix_user_conservation_actions_school_completed", "user_conservation_actions", ["school_id", "completed_at"],
+    )
+    _create_index(
+        "ix_user_animal_discoveries_school_discovered", "user_animal_discoveries", ["school_id", "discovered_at"],
+    )
+
+    # Version stamps for ETags and snapshot deltas
+    for table in STAMPED_TABLES:
+        _add_column(table, sa.Column("last_updated", sa.DateTime, nullable=True))
+    for table in ("animals", *STAMPED_TABLES):
+        _create_index(f"ix_{table}_last_updated", table, ["last_updated"])
+    op.execute("UPDATE habitats SET last_updated = CURRENT_TIMESTAMP WHERE last_updated IS NULL")
+    op.execute("UPDATE conservation_efforts SET last_updated = CURRENT_TIMESTAMP WHERE last_updated IS NULL")
+    op.execute(
+        "UPDATE ecosystem_interactions SET last_updated = COALESCE(created_at, CURRENT_TIMESTAMP) "
+        "WHERE last_updated IS NULL"
+    )
+    op.execute("UPDATE animals SET last_updated = CURRENT_TIMESTAMP WHERE last_updated IS NULL")
+    op.execute(
+        "INSERT INTO catalog_revisions (id, revision, updated_at) "
+        "SELECT 1, 1, CURRENT_TIMESTAMP WHERE NOT EXISTS (SELECT 1 FROM catalog_revisions)"
+    )
+
+    # Moderation queue
+    _add_column(
+        "ecosystem_interactions",
+        sa.Column(
+            "candidate_id", sa.Integer,
+            sa.ForeignKey("interaction_candidates.id", name="fk_ecosystem_interactions_candidate_id"), nullable=True,
+        ),
+    )
+    _create_index("ix_ecosystem_interactions_candidate_id", "ecosystem_interactions", ["candidate_id"])
+    _upgrade_candidates()
+
+    # Keyset pagination of a habitat's animals
+    _create_index("ix_animal_habitats_habitat_animal", "animal_habitats", ["habitat_id", "animal_id"])
+
+def downgrade():
+    op.drop_index("ix_animal_habitats_habitat_animal", table_name="animal_habitats")
+    op.drop_index("ix_ecosystem_interactions_candidate_id", table_name="ecosystem_interactions")
+    for table in ("animals", *STAMPED_TABLES):
+        op.drop_index(f"ix_{table}_last_updated", table_name=table)
+    with op.batch_alter_table("ecosystem_interactions") as batch:
+        batch.drop_column("candidate_id")
+    for table in STAMPED_TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("last_updated")
+
+    op.drop_index("ix_users_school_role", table_name="users")
+    op.drop_index("ix_quiz_attempts_school_completed", table_name="quiz_attempts")
+    op.drop_index("ix_user_conservation_actions_school_completed", table_name="user_conservation_actions")
+    op.drop_index("ix_user_animal_discoveries_school_discovered", table_name="user_animal_discoveries")
+    for table in ("users", *ACTIVITY_TABLES):
+        if table != "users":
+            op.drop_index(f"ix_{table}_school_user", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("school_id")
+
+    for table in (
+        "background_jobs", "catalog_revisions", "rate_limit_buckets", "conservation_action_counters",
+        "interaction_candidates", "habitat_animal_summaries", "schools",
+    ):
+        op.drop_table(table)
+    job_status.drop(op.get_bind(), checkfirst=True)
+    moderation_status.drop(op.get_bind(), checkfirst=True)
@@ -1,5 +1,6 @@
 from app.database import SessionLocal, engine
 from app.models.models import Animal, Habitat, ConservationEffort, ConservationStatus, Base
+import app.snapshot  # noqa: F401  (bumps the catalog revision on catalog writes)
 from datetime import datetime
 
 def create_tables():
@@ -285,6 +286,7 @@ def seed_database():
     except Exception as e:
         print(f"❌ Error seeding database: {e}")
         db.rollback()
+        raise
     finally:
         db.close()
 
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.coalescing import SingleFlight
+
+class CountingQuery:
+    def __init__(self, seconds=0.0, fail=False):
+        self.seconds = seconds
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        if self.fail:
+            raise RuntimeError("database down")
+        return {"id": key}
+
+def test_concurrent_callers_share_one_call():
+    flight, query = SingleFlight(), CountingQuery(seconds=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do(1, query, 1) for _ in range(30)])
+
+    assert asyncio.run(scenario()) == [{"id": 1}] * 30
+    assert query.calls == 1
+
+def test_callers_within_the_ttl_reuse_a_finished_result():
+    flight, query = SingleFlight(ttl=0.2), CountingQuery()
+
+    async def scenario():
+        # Thirty students arriving one after another against a fast query
+        for _ in range(30):
+            await flight.do(1, query, 1)
+            await asyncio.sleep(0.001)
+        await flight.do(2, query, 2)
+        await asyncio.sleep(0.3)
+        await flight.do(1, query, 1)
+
+    asyncio.run(scenario())
+    assert query.calls == 3
+
+def test_without_ttl_sequential_callers_each_query():
+    flight, query = SingleFlight(), CountingQuery()
+
+    async def scenario():
+        for _ in range(3):
+            await flight.do(1, query, 1)
+
+    asyncio.run(scenario())
+    assert query.calls == 3
+
+def test_failures_are_not_cached():
+    flight, query = SingleFlight(ttl=10), CountingQuery(fail=True)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await flight.do(1, query, 1)
+
+    asyncio.run(scenario())
+    assert query.calls == 2
@@ -0,0 +1,88 @@
+import gzip
+import json
+import pytest
+from app.compression import brotli, compress, negotiate_encoding, precompressed_cache
+from app.models.models import Animal
+
+@pytest.fixture
+def animals(db):
+    precompressed_cache.clear()
+    db.add_all([
+        Animal(name=f"Animal {n}", scientific_name=f"Genus species{n}", description="Lives somewhere. " * 5)
+        for n in range(40)
+    ])
+    db.commit()
+
+def _list(client, **headers):
+    return client.get("/api/animals/", params={"limit": 100}, headers=headers)
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("deflate, *;q=0.5") == ("br" if brotli else "gzip")
+    assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("GZIP;q=bogus, deflate") is None
+
+def test_large_json_is_gzipped_with_a_per_encoding_etag(client, animals):
+    plain = _list(client, **{"Accept-Encoding": "identity"})
+    zipped = _list(client, **{"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["vary"]
+    assert int(zipped.headers["content-length"]) < len(plain.content)
+    assert zipped.json() == plain.json()
+    assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+
+def test_small_responses_are_not_compressed(client, db):
+    db.add(Animal(name="Elk", scientific_name="Cervus canadensis"))
+    db.commit()
+    response = _list(client, **{"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+def test_compressed_bodies_are_cached_by_etag(client, animals):
+    _list(client, **{"Accept-Encoding": "gzip"})
+    (key, body), = precompressed_cache._entries.items()
+    assert key[3] == "gzip"
+    assert json.loads(gzip.decompress(body)) == _list(client, **{"Accept-Encoding": "identity"}).json()
+    assert body == compress(gzip.decompress(body), "gzip", cacheable=True)
+
+def test_if_none_match_returns_304_for_any_encoding_of_the_etag(client, animals):
+    plain = _list(client, **{"Accept-Encoding": "identity"})
+    zipped = _list(client, **{"Accept-Encoding": "gzip"})
+
+    # A 304 repeats the validator of whichever representation the client cached
+    sent = {
+        plain.headers["etag"]: plain.headers["etag"],
+        zipped.headers["etag"]: zipped.headers["etag"],
+        f'W/{zipped.headers["etag"]}, "other"': zipped.headers["etag"],
+    }
+    for if_none_match, etag in sent.items():
+        revalidated = _list(client, **{"Accept-Encoding": "gzip", "If-None-Match": if_none_match})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+        assert "Accept-Encoding" in revalidated.headers["vary"]
+
+    assert _list(client, **{"If-None-Match": '"animals-0-0"'}).status_code == 200
+
+def test_etag_changes_when_the_catalog_changes(client, db, animals):
+    etag = _list(client).headers["etag"]
+
+    db.query(Animal).filter(Animal.name == "Animal 3").one().description = "Moved house."
+    db.commit()
+    assert _list(client, **{"If-None-Match": etag}).status_code == 200
+
+    etag = _list(client).headers["etag"]
+    db.delete(db.query(Animal).filter(Animal.name == "Animal 4").one())
+    db.commit()
+    assert _list(client, **{"If-None-Match": etag}).status_code == 200
+
+def test_animal_detail_revalidates(client, db, animals):
+    animal_id = db.query(Animal.id).filter(Animal.name == "Animal 0").scalar()
+    response = client.get(f"/api/animals/{animal_id}")
+    assert response.status_code == 200
+    again = client.get(f"/api/animals/{animal_id}", headers={"If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine
+from app import database
+from app.database import ReplicaRouter, open_read_session
+from app.models.models import Animal, Base
+
+def _sqlite_engine(path):
+    return create_engine(f"sqlite:///{path}")
+
+def test_router_round_robins_and_skips_down_replicas(tmp_path):
+    first, second = _sqlite_engine(tmp_path / "a.db"), _sqlite_engine(tmp_path / "b.db")
+    router = ReplicaRouter([first, second])
+
+    assert [router.pick(), router.pick(), router.pick()] == [first, second, first]
+
+    router.mark_down(first)
+    assert [router.pick(), router.pick()] == [second, second]
+
+    router.mark_down(second)
+    assert router.pick() is None
+
+def test_read_session_fails_over_to_healthy_replica(tmp_path, monkeypatch):
+    dead = _sqlite_engine(tmp_path / "missing-dir" / "replica.db")
+    healthy = _sqlite_engine(tmp_path / "replica.db")
+    router = ReplicaRouter([dead, healthy])
+    monkeypatch.setattr(database, "replica_router", router)
+
+    with open_read_session() as db:
+        assert db.get_bind() is healthy
+    assert router.pick() is healthy  # the dead one is skipped until it is retried
+
+def test_read_session_uses_primary_when_pinned_or_without_replicas(tmp_path, monkeypatch):
+    replica = _sqlite_engine(tmp_path / "replica.db")
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter([replica]))
+    with open_read_session(use_primary=True) as db:
+        assert db.get_bind() is database.engine
+
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter([]))
+    with open_read_session() as db:
+        assert db.get_bind() is database.engine
+
+def test_reads_follow_a_write_to_the_primary(client, tmp_path, monkeypatch):
+    # The replica is an empty copy of the schema, so a read that reaches it finds nothing
+    replica = _sqlite_engine(tmp_path / "replica.db")
+    Base.metadata.create_all(bind=replica)
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter([replica]))
+
+    assert client.get("/api/animals/random").status_code == 404
+
+    created = client.post("/api/animals/", json={"name": "Gray Wolf", "scientific_name": "Canis lupus"})
+    assert created.status_code == 200
+    assert database.READ_YOUR_WRITES_COOKIE in created.cookies
+
+    # Inside the window the cookie routes this client's reads to the primary
+    assert client.get("/api/animals/random").json()["name"] == "Gray Wolf"
+
+    client.cookies.clear()
+    assert client.get("/api/animals/random").status_code == 404
+
+def test_expired_or_garbled_cookie_reads_from_replicas():
+    from starlette.requests import Request
+
+    def request_with(cookie):
+        return Request({"type": "http", "headers": [(b"cookie", cookie.encode())]})
+
+    assert not database.wants_primary(request_with(f"{database.READ_YOUR_WRITES_COOKIE}=1"))
+    assert not database.wants_primary(request_with(f"{database.READ_YOUR_WRITES_COOKIE}=soon"))
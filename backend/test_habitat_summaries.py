@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+import app.habitat_summaries as habitat_summaries
+from app.database import engine
+from app.habitat_summaries import refresh_summaries
+from app.models.models import Animal, ConservationStatus, Habitat, HabitatAnimalSummary
+
+@pytest.fixture
+def forest(db):
+    forest = Habitat(name="Forest")
+    forest.animals = [
+        Animal(name="Gray Wolf", scientific_name="Canis lupus", conservation_status=ConservationStatus.LEAST_CONCERN,
+               image_urls=["https://images.example.org/wolf.jpg"]),
+        Animal(name="Red Wolf", scientific_name="Canis rufus",
+               conservation_status=ConservationStatus.CRITICALLY_ENDANGERED),
+    ]
+    db.add(forest)
+    db.commit()
+    return forest
+
+def _summary(db, habitat_id):
+    db.expire_all()
+    return db.get(HabitatAnimalSummary, habitat_id)
+
+def test_summaries_follow_catalog_changes(db, forest):
+    summary = _summary(db, forest.id)
+    assert (summary.animal_count, summary.threatened_count) == (2, 1)
+    assert summary.status_counts == {"Least Concern": 1, "Critically Endangered": 1}
+    assert summary.thumbnail_urls == ["https://images.example.org/wolf.jpg"]
+
+    forest.animals[0].conservation_status = ConservationStatus.ENDANGERED
+    db.commit()
+    assert _summary(db, forest.id).threatened_count == 2
+
+    forest.animals.pop()
+    db.commit()
+    assert _summary(db, forest.id).animal_count == 1
+
+def test_refresh_overwrites_existing_rows(db, forest):
+    with engine.begin() as connection:
+        assert refresh_summaries(connection) == 1
+        assert refresh_summaries(connection, {forest.id}) == 1
+    assert _summary(db, forest.id).animal_count == 2
+
+def test_refresh_without_upsert_support(db, forest, monkeypatch):
+    monkeypatch.setattr(habitat_summaries, "UPSERT_DIALECTS", {})
+    plains = Habitat(name="Plains")
+    db.add(plains)
+    db.commit()
+    with engine.begin() as connection:
+        assert refresh_summaries(connection) == 2
+    assert _summary(db, forest.id).animal_count == 2
+    assert _summary(db, plains.id).animal_count == 0
+
+def test_refresh_drops_summaries_of_deleted_habitats(db, forest):
+    db.delete(forest)
+    db.commit()
+    with engine.begin() as connection:
+        assert refresh_summaries(connection) == 0
+    assert db.query(HabitatAnimalSummary).count() == 0
+
+@pytest.mark.parametrize("dialects", [habitat_summaries.UPSERT_DIALECTS, {}], ids=["on-conflict", "update-insert"])
+def test_writing_over_a_concurrently_inserted_row(db, forest, monkeypatch, dialects):
+    # The row another transaction committed after our refresh started must be overwritten, not collided with
+    monkeypatch.setattr(habitat_summaries, "UPSERT_DIALECTS", dialects)
+    row = {
+        "habitat_id": forest.id, "animal_count": 7, "threatened_count": 0,
+        "status_counts": {}, "thumbnail_urls": [], "refreshed_at": None,
+    }
+    with engine.begin() as connection:
+        habitat_summaries._write_summaries(connection, [row])
+    assert _summary(db, forest.id).animal_count == 7
+
+def test_refresh_locks_habitats_before_counting(db, forest):
+    # A concurrent refresh of the same habitat must wait and then count our rows, not overwrite them
+    statements = []
+
+    def record(connection, clauseelement, multiparams, params, execution_options):
+        statements.append(clauseelement)
+
+    with engine.begin() as connection:
+        event.listen(connection, "before_execute", record)
+        refresh_summaries(connection, {forest.id})
+    first = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "FROM habitats" in first
+    assert first.endswith("ORDER BY habitats.id FOR NO KEY UPDATE")
+
+def test_habitat_members_are_paged_by_id(client, db, forest):
+    forest.animals.extend(Animal(name=f"Beetle {n}", scientific_name=f"Coleoptera {n}") for n in range(3))
+    db.commit()
+    ids = sorted(animal.id for animal in forest.animals)
+
+    first = client.get(f"/api/habitats/{forest.id}/animals", params={"limit": 3}).json()
+    assert [animal["id"] for animal in first["animals"]] == ids[:3]
+    rest = client.get(f"/api/habitats/{forest.id}/animals", params={"limit": 3, "after": first["next_after"]}).json()
+    assert [animal["id"] for animal in rest["animals"]] == ids[3:]
+    assert rest["next_after"] is None
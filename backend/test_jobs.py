@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app.jobs import JOB_TIMEOUT_SECONDS, JobRunner, dedupe_key, enqueue, job
+from app.models.models import BackgroundJob, JobStatus
+
+calls = []
+
+@job("test_record", max_attempts=2)
+def record(value):
+    calls.append(value)
+    if value == "boom":
+        raise RuntimeError("boom")
+    return {"value": value}
+
+def _run(runner):
+    """Claim due jobs and wait for them to finish"""
+    runner._executor = ThreadPoolExecutor(max_workers=runner.workers)
+    claimed = runner.run_pending()
+    runner._executor.shutdown(wait=True)
+    runner._executor = None
+    return claimed
+
+def _status(db, job_id):
+    db.expire_all()
+    return db.get(BackgroundJob, job_id)
+
+def test_enqueue_dedupes_pending_jobs(db):
+    first = enqueue(db, "test_record", {"value": 1})
+    assert enqueue(db, "test_record", {"value": 1}).id == first.id
+    assert enqueue(db, "test_record", {"value": 2}).id != first.id
+    assert enqueue(db, "test_record", {"value": 1}, dedupe=False).id != first.id
+
+def test_claimed_job_runs_once(db):
+    calls.clear()
+    queued = enqueue(db, "test_record", {"value": "ok"})
+    runner = JobRunner(workers=2)
+
+    assert _run(runner) == 1
+    assert _run(runner) == 0
+    finished = _status(db, queued.id)
+    assert finished.status == JobStatus.SUCCEEDED
+    assert finished.result == {"value": "ok"}
+    assert calls == ["ok"]
+
+def test_failures_back_off_then_fail(db):
+    queued = enqueue(db, "test_record", {"value": "boom"})
+    runner = JobRunner(workers=1)
+
+    _run(runner)
+    retried = _status(db, queued.id)
+    assert retried.status == JobStatus.PENDING
+    assert retried.run_after > datetime.utcnow()
+    assert "RuntimeError: boom" in retried.last_error
+
+    retried.run_after = datetime.utcnow()
+    db.commit()
+    _run(runner)
+    assert _status(db, queued.id).status == JobStatus.FAILED
+
+def test_failed_seed_is_recorded_as_failed(db, monkeypatch):
+    import seed_data
+
+    def broken(db):
+        raise RuntimeError("bad seed row")
+
+    monkeypatch.setattr(seed_data, "seed_animals", broken)
+    queued = enqueue(db, "seed_database")
+    _run(JobRunner(workers=1))
+
+    failed = _status(db, queued.id)
+    assert failed.status == JobStatus.FAILED
+    assert "bad seed row" in failed.last_error
+
+def test_stale_duplicates_requeue_only_the_oldest(db):
+    started_at = datetime.utcnow() - timedelta(seconds=JOB_TIMEOUT_SECONDS + 60)
+    key = dedupe_key("test_record", {"value": 1})
+
+    def running(key, attempts=1):
+        row = BackgroundJob(
+            name="test_record", args={"value": 1}, dedupe_key=key, status=JobStatus.RUNNING,
+            attempts=attempts, max_attempts=2, started_at=started_at, locked_by="gone:1",
+        )
+        db.add(row)
+        return row
+
+    exhausted = running(key, attempts=2)
+    oldest, newer, newest = running(key), running(key), running(key)
+    queued_key = dedupe_key("test_record", {"value": 2})
+    superseded = running(queued_key)
+    lone = running(None)
+    db.commit()
+    already_queued = enqueue(db, "test_record", {"value": 2})
+
+    assert JobRunner().requeue_stale() == 2
+    statuses = {row.id: _status(db, row.id).status for row in (exhausted, oldest, newer, newest, superseded, lone)}
+    assert statuses == {
+        exhausted.id: JobStatus.FAILED,
+        oldest.id: JobStatus.PENDING,
+        newer.id: JobStatus.FAILED,
+        newest.id: JobStatus.FAILED,
+        superseded.id: JobStatus.FAILED,
+        lone.id: JobStatus.PENDING,
+    }
+    assert _status(db, already_queued.id).status == JobStatus.PENDING
+
+def test_poll_still_claims_jobs_when_requeue_fails(db):
+    runner = JobRunner()
+    polled = []
+
+    def broken():
+        raise RuntimeError("database went away")
+
+    def run_pending():
+        polled.append(True)
+        runner._stopping.set()
+
+    runner.requeue_stale = broken
+    runner.run_pending = run_pending
+    runner._loop()
+    assert polled == [True]
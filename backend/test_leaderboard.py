@@ -0,0 +1,103 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from app.database import engine
+from app.leaderboard import SortedCounts, leaderboards, rebuild_counters
+from app.models.models import ConservationActionCounter, ConservationEffort, School, User, UserConservationAction
+
+@pytest.fixture
+def community(db):
+    schools = [School(name="Lincoln Middle"), School(name="Roosevelt Middle")]
+    efforts = [ConservationEffort(title="Save the Reef"), ConservationEffort(title="Plant a Forest")]
+    db.add_all(schools + efforts)
+    db.flush()
+    users = [
+        User(email=f"student{n}@example.org", username=f"student{n}", hashed_password="x", school_id=schools[n % 2].id)
+        for n in range(4)
+    ]
+    db.add_all(users)
+    db.commit()
+    leaderboards.refresh(db)
+    return [school.id for school in schools], [effort.id for effort in efforts], [user.id for user in users]
+
+def _act(client, effort_id, user_id, action_type="petition_signed"):
+    response = client.post(
+        f"/api/conservation-efforts/{effort_id}/actions", json={"user_id": user_id, "action_type": action_type},
+    )
+    assert response.status_code == 200
+
+def _counters(db):
+    return sorted(db.execute(select(ConservationActionCounter.__table__)).all())
+
+def test_sorted_counts_keeps_members_ordered():
+    counts = SortedCounts({"a": 2, "b": 5})
+    counts.add("a", 4)
+    counts.add("c")
+    assert counts.top(2) == [("a", 6), ("b", 5)]
+    assert counts.top(10)[-1] == ("c", 1)
+
+def test_actions_update_the_leaderboard(client, community):
+    (lincoln, roosevelt), (reef, forest), users = community
+    for user_id in users:
+        _act(client, reef, user_id)
+    _act(client, forest, users[0], action_type="shared")
+
+    efforts = client.get("/api/conservation-efforts/leaderboard", params={"period": "day"}).json()
+    assert [(entry["conservation_effort_id"], entry["count"]) for entry in efforts] == [(reef, 4), (forest, 1)]
+    assert efforts[0]["title"] == "Save the Reef"
+
+    schools = client.get("/api/conservation-efforts/leaderboard", params={"scope": "school"}).json()
+    assert [(entry["school_id"], entry["count"]) for entry in schools] == [(lincoln, 3), (roosevelt, 2)]
+
+    shared = client.get("/api/conservation-efforts/leaderboard", params={"action_type": "shared"}).json()
+    assert [entry["conservation_effort_id"] for entry in shared] == [forest]
+
+def test_rebuild_matches_the_incremental_counters(client, db, community):
+    _, (reef, forest), users = community
+    for n, user_id in enumerate(users):
+        _act(client, reef if n % 3 else forest, user_id, action_type=["shared", "learned_about"][n % 2])
+    incremental = _counters(db)
+
+    with engine.begin() as connection:
+        assert rebuild_counters(connection) == len(incremental)
+    db.expire_all()
+    assert _counters(db) == incremental
+
+def test_rebuild_counts_imported_actions(db, community):
+    _, (reef, _), users = community
+    last_week = datetime.utcnow() - timedelta(days=8)
+    # Core inserts skip the after_insert hook that maintains the counters
+    db.execute(insert(UserConservationAction), [
+        {"user_id": user_id, "conservation_effort_id": reef, "action_type": "shared", "completed_at": last_week}
+        for user_id in users
+    ])
+    db.commit()
+    assert _counters(db) == []
+
+    with engine.begin() as connection:
+        rebuild_counters(connection)
+    db.expire_all()
+    totals = {}
+    for row in _counters(db):
+        totals[row.period] = totals.get(row.period, 0) + row.count
+    assert totals == {"day": 4, "week": 4}
+
+def test_rebuild_holds_the_write_lock_until_commit(db, community):
+    _, (reef, _), users = community
+    impatient = create_engine(str(engine.url), connect_args={"timeout": 0.1})
+    try:
+        with engine.begin() as connection:
+            rebuild_counters(connection)
+            # A concurrent action would have to wait for the rebuild to commit
+            with pytest.raises(OperationalError, match="locked"):
+                with impatient.begin() as other:
+                    other.execute(insert(UserConservationAction).values(user_id=users[0], conservation_effort_id=reef))
+    finally:
+        impatient.dispose()
+
+def test_actions_without_an_effort_are_not_counted(db, community):
+    _, _, users = community
+    db.add(UserConservationAction(user_id=users[0], action_type="shared"))
+    db.commit()
+    assert _counters(db) == []
@@ -0,0 +1,24 @@
+from pathlib import Path
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+from app.models.models import Base
+
+def test_upgrade_leaves_no_schema_drift(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config()  # No ini file, so alembic leaves the test logging alone
+    config.set_main_option("script_location", str(Path(__file__).parent / "migrations"))
+
+    # Startup's create_all() first, as on a fresh deploy; the migration must tolerate it
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    command.upgrade(config, "head")
+    command.upgrade(config, "head")
+
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+        assert connection.exec_driver_sql("SELECT revision FROM catalog_revisions").scalar() == 1
+    engine.dispose()
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app.models.models import (
+    Animal, EcosystemInteraction, EcosystemRelationType, Habitat, InteractionCandidate, ModerationStatus,
+)
+
+@pytest.fixture
+def animals(db):
+    wolf = Animal(name="Gray Wolf", scientific_name="Canis lupus")
+    elk = Animal(name="Elk", scientific_name="Cervus canadensis")
+    deer = Animal(name="Mule Deer", scientific_name="Odocoileus hemionus")
+    forest = Habitat(name="Forest")
+    db.add_all([wolf, elk, deer, forest])
+    db.commit()
+    return wolf.id, elk.id, deer.id, forest.id
+
+def _submit(client, predator_id, prey_id, habitat_id=None, interaction_type="predator_prey"):
+    response = client.post("/api/ecosystem-interactions/", json={
+        "predator_id": predator_id, "prey_id": prey_id,
+        "interaction_type": interaction_type, "habitat_id": habitat_id,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def _review(client, action, **review):
+    response = client.post(f"/api/moderation/candidates/{action}", json=review)
+    assert response.status_code == 200
+    return response.json()
+
+def test_duplicate_submissions_without_a_habitat_share_a_candidate(client, db, animals):
+    wolf, elk, _, forest = animals
+    first = _submit(client, wolf, elk)
+    second = _submit(client, wolf, elk)
+    _submit(client, wolf, elk, habitat_id=forest)
+    _submit(client, wolf, None)
+    _submit(client, wolf, None)
+
+    assert first["candidate_id"] == second["candidate_id"]
+    votes = sorted(db.query(InteractionCandidate.edge_key, InteractionCandidate.vote_count).all())
+    assert votes == [
+        (f"{wolf}:-:predator_prey:-", 2),
+        (f"{wolf}:{elk}:predator_prey:-", 2),
+        (f"{wolf}:{elk}:predator_prey:{forest}", 1),
+    ]
+
+def test_edge_key_rejects_a_second_candidate_with_null_columns(db, animals):
+    wolf, elk, _, _ = animals
+    edge = {"predator_id": wolf, "prey_id": elk, "interaction_type": EcosystemRelationType.PREDATOR_PREY}
+    db.execute(insert(InteractionCandidate).values(**edge))
+    with pytest.raises(IntegrityError):
+        db.execute(insert(InteractionCandidate).values(**edge))
+
+def test_bulk_approve_verifies_only_this_batch(client, db, animals):
+    wolf, elk, deer, forest = animals
+    approved = _submit(client, wolf, elk)["candidate_id"]
+    _submit(client, wolf, elk)
+    pending = _submit(client, wolf, deer)["candidate_id"]
+    rejected = _submit(client, deer, elk, interaction_type="competition")["candidate_id"]
+
+    assert _review(client, "reject", candidate_ids=[rejected]) == {"candidates_updated": 1, "interactions_updated": 0}
+    # min_votes picks the same candidate again; it is only counted once
+    result = _review(client, "approve", candidate_ids=[approved, rejected], min_votes=2)
+    assert result == {"candidates_updated": 1, "interactions_updated": 2}
+
+    statuses = dict(db.query(InteractionCandidate.id, InteractionCandidate.status).all())
+    assert statuses == {
+        approved: ModerationStatus.APPROVED, pending: ModerationStatus.PENDING, rejected: ModerationStatus.REJECTED,
+    }
+    verified = dict(db.query(EcosystemInteraction.candidate_id, EcosystemInteraction.is_verified).all())
+    assert verified == {approved: True, pending: False, rejected: False}
+
+def test_approval_settles_pending_candidates_for_the_same_edge(client, db, animals):
+    wolf, elk, _, forest = animals
+    anywhere = _submit(client, wolf, elk)["candidate_id"]
+    in_forest = _submit(client, wolf, elk, habitat_id=forest)["candidate_id"]
+
+    result = _review(client, "approve", candidate_ids=[anywhere])
+    assert result == {"candidates_updated": 2, "interactions_updated": 2}
+    assert db.get(InteractionCandidate, in_forest).auto_verified
+
+    # The edge is verified now, so a new candidate in another habitat is approved on arrival
+    plains = Habitat(name="Plains")
+    db.add(plains)
+    db.commit()
+    later = _submit(client, wolf, elk, habitat_id=plains.id)
+    assert later["is_verified"]
+    assert db.get(InteractionCandidate, later["candidate_id"]).auto_verified
@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.database import engine
+from app.rate_limit import CLASSROOM_HEADER, DatabaseBackend, MemoryBackend, RateLimiter
+
+def _request(host="10.0.0.1", classroom=None):
+    headers = [(CLASSROOM_HEADER.lower().encode(), classroom.encode())] if classroom else []
+    return Request({"type": "http", "headers": headers, "client": (host, 1234)})
+
+def _allowed(limiter, request):
+    try:
+        limiter(request)
+        return True
+    except HTTPException as error:
+        assert error.status_code == 429
+        assert int(error.headers["Retry-After"]) >= 1
+        return False
+
+def test_burst_then_429():
+    limiter = RateLimiter(rate=0.001, capacity=3, backend=MemoryBackend())
+    assert [_allowed(limiter, _request()) for _ in range(4)] == [True, True, True, False]
+    # Another address has its own bucket
+    assert _allowed(limiter, _request(host="10.0.0.2"))
+
+def test_rotating_classroom_header_does_not_bypass_the_address_limit():
+    limiter = RateLimiter(rate=0.001, capacity=3, backend=MemoryBackend())
+    results = [_allowed(limiter, _request(classroom=f"room-{n}")) for n in range(5)]
+    assert results == [True, True, True, False, False]
+
+def test_classrooms_behind_one_address_get_their_own_limit():
+    # A school's NAT: one address, many classrooms
+    limiter = RateLimiter(
+        rate=0.001, capacity=100, classroom_rate=0.001, classroom_capacity=2, backend=MemoryBackend(),
+    )
+    room_7 = [_request(classroom="room-7") for _ in range(3)]
+    assert [_allowed(limiter, request) for request in room_7] == [True, True, False]
+    assert _allowed(limiter, _request(classroom="room-8"))
+    assert _allowed(limiter, _request())
+    # Another school's room-7 is a different classroom
+    assert _allowed(limiter, _request(host="10.0.9.1", classroom="room-7"))
+
+def test_default_address_limit_fits_a_school():
+    limiter = RateLimiter(backend=MemoryBackend())
+    classrooms = [_request(classroom=f"room-{n}") for n in range(10)]
+    assert all(_allowed(limiter, request) for _ in range(limiter.classroom_capacity) for request in classrooms)
+
+def test_database_backend_shares_buckets(db):
+    limiter = RateLimiter(rate=0.001, capacity=2, backend=DatabaseBackend(bind=engine))
+    other_worker = RateLimiter(rate=0.001, capacity=2, backend=DatabaseBackend(bind=engine))
+    assert _allowed(limiter, _request())
+    assert _allowed(other_worker, _request())
+    assert not _allowed(limiter, _request())
@@ -0,0 +1,166 @@
+import gzip
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.jobs import JobRunner
+from app.models.models import Animal, BackgroundJob, EcosystemInteraction, EcosystemRelationType, Habitat, JobStatus
+from app.snapshot import SNAPSHOT_DIR, catalog_version
+
+def _bundle(response, tmp_path):
+    path = tmp_path / "bundle.sqlite"
+    path.write_bytes(gzip.decompress(response.content))
+    return sqlite3.connect(path)
+
+def _get(client, since=None):
+    params = {} if since is None else {"since": since}
+    return client.get("/api/snapshots/bundle", params=params)
+
+def _run_jobs():
+    """Run what the job runner would claim between two device requests"""
+    runner = JobRunner(workers=4)
+    runner._executor = ThreadPoolExecutor(max_workers=runner.workers)
+    claimed = runner.run_pending()
+    runner._executor.shutdown(wait=True)
+    runner._executor = None
+    return claimed
+
+def _sync(client, since=None):
+    """Request until the server has nothing left to build for this device"""
+    while True:
+        response = _get(client, since)
+        if not _run_jobs():
+            return response
+
+def _queued_builds(db):
+    db.expire_all()
+    return db.query(BackgroundJob.args).filter(
+        BackgroundJob.name == "build_snapshot", BackgroundJob.status == JobStatus.PENDING,
+    ).all()
+
+@pytest.fixture
+def catalog(db):
+    wolf = Animal(name="Gray Wolf", scientific_name="Canis lupus")
+    elk = Animal(name="Elk", scientific_name="Cervus canadensis")
+    forest = Habitat(name="Forest")
+    wolf.habitats.append(forest)
+    db.add_all([wolf, elk, forest])
+    db.flush()
+    db.add(EcosystemInteraction(predator_id=wolf.id, prey_id=elk.id, interaction_type=EcosystemRelationType.PREDATOR_PREY, is_verified=True))
+    db.commit()
+    return wolf, elk, forest
+
+def test_every_catalog_write_bumps_the_revision(db, catalog):
+    wolf, elk, forest = catalog
+    versions = [catalog_version(db)]
+
+    elk.habitats.append(forest)  # association table only
+    db.commit()
+    versions.append(catalog_version(db))
+
+    interaction = db.query(EcosystemInteraction).one()
+    interaction.is_verified = False
+    db.commit()
+    versions.append(catalog_version(db))
+
+    assert versions[0] > 0
+    assert versions == sorted(set(versions))
+
+def test_only_interactions_that_can_ship_bump_the_revision(client, db, catalog):
+    wolf, elk, forest = catalog
+    version = catalog_version(db)
+
+    def submit(prey_id):
+        response = client.post("/api/ecosystem-interactions/", json={
+            "predator_id": wolf.id, "prey_id": prey_id, "interaction_type": "predator_prey", "habitat_id": forest.id,
+        })
+        assert response.status_code == 200
+        return response.json()
+
+    pending = submit(wolf.id)
+    submit(wolf.id)
+    db.expire_all()
+    assert not pending["is_verified"]
+    assert catalog_version(db) == version
+
+    # Wolf -> elk is already verified, so this submission is approved on arrival and ships
+    assert submit(elk.id)["is_verified"]
+    db.expire_all()
+    assert catalog_version(db) == version + 1
+
+    response = client.post("/api/moderation/candidates/approve", json={"candidate_ids": [pending["candidate_id"]]})
+    assert response.json()["interactions_updated"] == 2
+    db.expire_all()
+    assert catalog_version(db) == version + 2
+
+def test_membership_change_reaches_devices_as_a_delta(client, db, catalog, tmp_path):
+    wolf, elk, forest = catalog
+    first = _sync(client)
+    version = int(first.headers["X-Snapshot-Version"])
+    assert _get(client, since=version).status_code == 204
+
+    elk.habitats.append(forest)
+    db.commit()
+
+    delta = _sync(client, since=version)
+    assert delta.status_code == 200
+    assert delta.headers["X-Snapshot-Since"] == str(version)
+    pairs = _bundle(delta, tmp_path).execute("SELECT animal_id, habitat_id FROM animal_habitats").fetchall()
+    assert (elk.id, forest.id) in pairs
+
+def test_unverified_interaction_is_dropped_by_the_next_delta(client, db, catalog, tmp_path):
+    version = int(_sync(client).headers["X-Snapshot-Version"])
+
+    interaction = db.query(EcosystemInteraction).one()
+    interaction.is_verified = False
+    db.commit()
+
+    delta = _sync(client, since=version)
+    assert delta.status_code == 200
+    bundle = _bundle(delta, tmp_path)
+    assert bundle.execute(
+        "SELECT id FROM catalog_ids WHERE table_name = 'ecosystem_interactions'"
+    ).fetchall() == []
+
+def test_unpublished_since_gets_the_full_bundle_without_new_files(client, db, catalog):
+    full = _sync(client)
+    files = sorted(os.listdir(SNAPSHOT_DIR))
+
+    for since in (0, 1, 999999999999):
+        response = _get(client, since=since)
+        assert response.status_code == 200
+        assert response.headers["X-Snapshot-Since"] == "0"
+        assert response.content == full.content
+
+    assert sorted(os.listdir(SNAPSHOT_DIR)) == files
+    assert _queued_builds(db) == []
+
+def test_bundles_are_built_by_a_job_not_the_request(client, db, catalog):
+    wolf, elk, forest = catalog
+    for _ in range(2):
+        response = _get(client)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+    assert not os.path.exists(SNAPSHOT_DIR) or os.listdir(SNAPSHOT_DIR) == []
+    assert _queued_builds(db) == [({},)]
+
+    _run_jobs()
+    current = _get(client)
+    version = int(current.headers["X-Snapshot-Version"])
+    assert current.headers["Cache-Control"] == "public, max-age=3600"
+
+    # The newest built bundle stands in while the next one is queued
+    elk.habitats.append(forest)
+    db.commit()
+    stand_in = _get(client)
+    assert stand_in.headers["X-Snapshot-Version"] == str(version)
+    assert stand_in.headers["Cache-Control"] == "no-cache"
+    assert _get(client, since=version).status_code == 204
+    assert _queued_builds(db) == [({},)]
+
+    _run_jobs()
+    # The device's delta is queued on first request and the full bundle served meanwhile
+    assert _get(client, since=version).headers["X-Snapshot-Since"] == "0"
+    assert _queued_builds(db) == [({"since": version},)]
+    _run_jobs()
+    assert _get(client, since=version).headers["X-Snapshot-Since"] == str(version)
@@ -0,0 +1,110 @@
+import random
+import pytest
+from sqlalchemy import insert
+import app.suggest as suggest
+from app.models.models import Animal, User, user_animal_discoveries
+from app.suggest import SuggestIndex, normalize
+
+SYLLABLES = ["ar", "ba", "cor", "el", "fox", "ma", "zo", "qui", "a", "b"]
+
+def _name(rng, words):
+    return " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).title() for _ in range(words))
+
+# The default limit leaves every prefix of this small catalog to be scanned; 10 precomputes most
+@pytest.fixture(params=[suggest.SUGGEST_SCAN_LIMIT, 10], ids=["scanned", "precomputed"])
+def scan_limit(request, monkeypatch):
+    monkeypatch.setattr(suggest, "SUGGEST_SCAN_LIMIT", request.param)
+    return request.param
+
+@pytest.fixture
+def catalog(db, scan_limit):
+    rng = random.Random(7)
+    animals = [
+        Animal(name=_name(rng, 2), scientific_name=_name(rng, 2), common_names=[_name(rng, 1) for _ in range(rng.randint(0, 2))])
+        for _ in range(300)
+    ]
+    users = [User(email=f"student{n}@example.org", username=f"student{n}", hashed_password="x") for n in range(5)]
+    db.add_all(animals + users)
+    db.commit()
+    db.execute(insert(user_animal_discoveries), [
+        {"user_id": rng.choice(users).id, "animal_id": rng.choice(animals[:60]).id} for _ in range(200)
+    ])
+    db.commit()
+    index = SuggestIndex(refresh_seconds=3600)
+    index.load(db)
+    return index, {animal.id: animal for animal in animals}
+
+def _brute_force(index, animals, prefix, limit):
+    prefix = normalize(prefix)
+    matches = [
+        animal for animal in animals.values()
+        if any(term.startswith(prefix) for term in suggest._terms(
+            [animal.name, animal.scientific_name, *(animal.common_names or [])]
+        ))
+    ]
+    matches.sort(key=lambda animal: (-index._weights.get(animal.id, 0), animal.name, animal.id))
+    return [(animal.id, animal.name, animal.scientific_name) for animal in matches[:limit]]
+
+def _prefixes(index):
+    short = {prefix for prefix in index._top}
+    longer = {term[:3] for term in index._terms} | {term[:5] for term in index._terms}
+    return sorted(short | longer | {"zz", "x", "Gray W"})
+
+def _matches(index, prefix):
+    return sum(term.startswith(prefix) for term in index._terms)
+
+def test_only_broad_prefixes_are_precomputed(catalog, scan_limit):
+    index, _ = catalog
+    every_prefix = {term[:length] for term in index._terms for length in range(1, len(term) + 1)}
+    for prefix in every_prefix:
+        assert (prefix in index._top) == (_matches(index, prefix) > scan_limit), prefix
+    assert all(len(ids) <= suggest.SUGGEST_TOP_K for ids in index._top.values())
+    if scan_limit == 10:
+        assert any(len(prefix) >= 3 for prefix in index._top)
+
+@pytest.mark.parametrize("limit", [1, 8, 20])
+def test_suggestions_match_brute_force(catalog, limit):
+    index, animals = catalog
+    for prefix in _prefixes(index):
+        assert index.suggest(prefix, limit) == _brute_force(index, animals, prefix, limit), prefix
+
+def test_added_animals_update_the_precomputed_lists(catalog):
+    index, animals = catalog
+    rng = random.Random(11)
+    for animal_id in range(10_000, 10_050):
+        # "X" starts no loaded term, so these create new short-prefix lists as well as joining old ones
+        animal = Animal(id=animal_id, name=f"X{_name(rng, 1).lower()}", scientific_name=_name(rng, 2), common_names=[])
+        animals[animal_id] = animal
+        index.add(animal.id, animal.name, animal.scientific_name, animal.common_names)
+
+    assert ("x" in index._top) == (_matches(index, "x") > suggest.SUGGEST_SCAN_LIMIT)
+    for prefix in _prefixes(index):
+        assert (prefix in index._top) == (_matches(index, prefix) > suggest.SUGGEST_SCAN_LIMIT), prefix
+        assert index.suggest(prefix, 20) == _brute_force(index, animals, prefix, 20), prefix
+
+def test_most_discovered_wins_beyond_the_scan_limit(db, monkeypatch):
+    # The favourite sorts last alphabetically, far past the first SUGGEST_SCAN_LIMIT matches
+    monkeypatch.setattr(suggest, "SUGGEST_SCAN_LIMIT", 5)
+    animals = [Animal(name=f"Cor {n:03}", scientific_name=f"Corvus {n:03}") for n in range(50)]
+    student = User(email="student@example.org", username="student", hashed_password="x")
+    db.add_all(animals + [student])
+    db.commit()
+    db.execute(insert(user_animal_discoveries), [{"user_id": student.id, "animal_id": animals[-1].id}])
+    db.commit()
+    index = SuggestIndex(refresh_seconds=3600)
+    index.load(db)
+
+    for prefix in ("c", "co", "cor", "corv", "cor 0"):
+        assert index.suggest(prefix, 3)[0] == (animals[-1].id, "Cor 049", "Corvus 049"), prefix
+
+def test_suggest_endpoint(client, db, monkeypatch):
+    index = SuggestIndex(refresh_seconds=3600)
+    monkeypatch.setattr("app.routers.animals.suggest_index", index)
+    db.add(Animal(name="Gray Wolf", scientific_name="Canis lupus", common_names=["Timber Wolf"]))
+    db.commit()
+    index.load(db)
+
+    response = client.get("/api/animals/suggest", params={"q": "WO"})
+    assert response.status_code == 200
+    assert [suggestion["name"] for suggestion in response.json()] == ["Gray Wolf"]
+    assert client.get("/api/animals/suggest", params={"q": "ti"}).json()[0]["scientific_name"] == "Canis lupus"
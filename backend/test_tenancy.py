@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import event, insert, select
+from app.database import engine
+from app.models.models import QuizAttempt, School, TenantScoped, User, UserConservationAction, user_animal_discoveries
+from app.tasks import backfill_tenants
+from app.tenancy import scope_session
+
+@pytest.fixture
+def schools(db):
+    lincoln, roosevelt = School(name="Lincoln Middle"), School(name="Roosevelt Middle")
+    db.add_all([lincoln, roosevelt])
+    db.flush()
+    db.add_all([
+        User(email=f"student{n}@example.org", username=f"student{n}", hashed_password="x",
+             school=("Lincoln Middle", "Roosevelt Middle")[n % 2], school_id=(lincoln.id, roosevelt.id)[n % 2])
+        for n in range(4)
+    ])
+    db.commit()
+    return lincoln.id, roosevelt.id
+
+def _user_ids(db, school_id):
+    return db.execute(select(User.id).where(User.school_id == school_id).order_by(User.id)).scalars().all()
+
+def test_activity_rows_take_their_users_school(db, schools):
+    lincoln, roosevelt = schools
+    db.add_all([QuizAttempt(user_id=user_id, score=3) for user_id in _user_ids(db, roosevelt)])
+    db.commit()
+    assert {attempt.school_id for attempt in db.query(QuizAttempt)} == {roosevelt}
+
+def test_bulk_insert_looks_up_schools_once(db, schools):
+    lincoln, roosevelt = schools
+    user_ids = _user_ids(db, lincoln) + _user_ids(db, roosevelt)
+    selects = []
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_selects)
+    try:
+        db.execute(insert(UserConservationAction), [
+            {"user_id": user_ids[n % len(user_ids)], "action_type": "shared"} for n in range(200)
+        ])
+    finally:
+        event.remove(engine, "before_cursor_execute", count_selects)
+    db.commit()
+
+    assert len(selects) == 1
+    schools_by_user = dict(db.query(User.id, User.school_id).all())
+    for user_id, school_id in db.query(UserConservationAction.user_id, UserConservationAction.school_id):
+        assert school_id == schools_by_user[user_id]
+
+def test_tenant_session_only_sees_its_school(client, db, schools):
+    lincoln, roosevelt = schools
+    for school_id in schools:
+        db.add_all([UserConservationAction(user_id=user_id) for user_id in _user_ids(db, school_id)])
+    db.add(UserConservationAction(user_id=_user_ids(db, lincoln)[0]))
+    db.commit()
+
+    scoped = scope_session(db, lincoln)
+    assert {action.school_id for action in scoped.query(UserConservationAction)} == {lincoln}
+    assert scoped.query(User).count() == 2
+
+    summary = client.get(f"/api/schools/{roosevelt}/summary").json()
+    assert (summary["students"], summary["conservation_actions"]) == (2, 2)
+    assert client.get("/api/schools/999/summary").status_code == 404
+
+def test_users_are_scoped_by_their_own_school_column(db, schools):
+    lincoln, _ = schools
+    # Only activity rows derive school_id from a user; a user's is set directly
+    assert not issubclass(User, TenantScoped)
+    assert User.__table__.c.school_id.default is None
+
+    scoped = scope_session(db, lincoln)
+    scoped.add(User(email="new@example.org", username="new", hashed_password="x"))
+    scoped.commit()
+    assert scoped.query(User).filter(User.username == "new").one().school_id == lincoln
+    assert scoped.query(User).count() == 3
+
+def test_backfill_creates_schools_and_stamps_activity(db):
+    db.add_all([
+        User(email="a@example.org", username="a", hashed_password="x", school="Lincoln Middle"),
+        User(email="b@example.org", username="b", hashed_password="x", school="Lincoln Middle"),
+        User(email="c@example.org", username="c", hashed_password="x"),
+    ])
+    db.commit()
+    db.execute(insert(user_animal_discoveries), [{"user_id": user.id} for user in db.query(User)])
+    db.commit()
+
+    assert backfill_tenants()["users_updated"] == 2
+    db.expire_all()
+    lincoln = db.query(School).filter(School.name == "Lincoln Middle").one()
+    stamped = dict(db.execute(select(user_animal_discoveries.c.user_id, user_animal_discoveries.c.school_id)).all())
+    assert stamped == {user.id: user.school_id for user in db.query(User)}
+    assert sorted(stamped.values(), key=str) == [lincoln.id, lincoln.id, None]
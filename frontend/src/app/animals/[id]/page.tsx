@@ -8,6 +8,7 @@ import { Brain, Lightbulb, BookOpen, ArrowLeft, Zap } from 'lucide-react';
 import Link from 'next/link';
 import type { Animal, ConservationStatus } from '@/types';
 import { getConservationColor, formatConservationStatus } from '@/lib/utils';
+import { apiFetch } from '@/lib/api';
 
 type PromptMode = 'role' | 'few-shot' | null;
 
@@ -24,7 +25,7 @@ export default function AnimalDetailPage() {
   useEffect(() => {
     const fetchAnimal = async () => {
       try {
-        const response = await fetch(`http://localhost:8000/api/animals/${params.id}`);
+        const response = await apiFetch(`/api/animals/${params.id}`);
         if (!response.ok) throw new Error('Animal not found');
         const data = await response.json();
         setAnimal(data);
@@ -3,6 +3,7 @@
 import React, { useState, useEffect } from 'react';
 import { MapPin, Award, TrendingUp, AlertCircle, Lightbulb, CheckCircle, ExternalLink, Users, Target, Brain, Loader } from 'lucide-react';
 import { ConservationEffort, Solution } from '@/types';
+import { apiFetch } from '@/lib/api';
 
 export default function ConservationActionCenter() {
   const [conservationEfforts, setConservationEfforts] = useState<ConservationEffort[]>([]);
@@ -20,7 +21,7 @@ export default function ConservationActionCenter() {
   const fetchConservationEfforts = async () => {
     try {
       setLoading(true);
-      const response = await fetch('http://localhost:8000/api/conservation-efforts');
+      const response = await apiFetch('/api/conservation-efforts');
       if (!response.ok) throw new Error('Failed to fetch conservation efforts');
       const data = await response.json();
       setConservationEfforts(data);
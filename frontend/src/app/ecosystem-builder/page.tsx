@@ -4,6 +4,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Trash2, Network, Sparkles } from 'lucide-react';
 import type { AnimalSummary, HabitatSummary, EcosystemAnimal, Relationship } from '@/types';
+import { apiFetch } from '@/lib/api';
 
 const EcosystemBuilder = () => {
   const [habitats, setHabitats] = useState<HabitatSummary[]>([]);
@@ -22,8 +23,8 @@ const EcosystemBuilder = () => {
     const fetchData = async () => {
       try {
         const [animalsRes, habitatsRes] = await Promise.all([
-          fetch('http://localhost:8000/api/animals/'),
-          fetch('http://localhost:8000/api/habitats/')
+          apiFetch('/api/animals/'),
+          apiFetch('/api/habitats/')
         ]);
         
         const animalsData = await animalsRes.json();
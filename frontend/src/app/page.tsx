@@ -4,6 +4,7 @@ import { useEffect, useState } from 'react';
 import Link from 'next/link';
 import AnimalCard from '@/components/animal-cards/AnimalCard';
 import type { AnimalSummary } from '@/types';
+import { apiFetch } from '@/lib/api';
 
 export default function HomePage() {
   const [animals, setAnimals] = useState<AnimalSummary[]>([]);
@@ -13,7 +14,7 @@ export default function HomePage() {
   useEffect(() => {
     const fetchAnimals = async () => {
       try {
-        const response = await fetch('http://localhost:8000/api/animals/');
+        const response = await apiFetch('/api/animals/');
         if (!response.ok) {
           throw new Error('Failed to fetch animals');
         }
@@ -0,0 +1,8 @@
+export const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+
+// The API pins a client's reads to the primary database for a few seconds
+// after it writes (read-your-writes), using a cookie. Cross-origin fetches
+// only send and store that cookie with credentials: 'include'.
+export function apiFetch(path: string, init: RequestInit = {}) {
+  return fetch(`${API_URL}${path}`, { credentials: 'include', ...init });
+}